@@ -0,0 +1,204 @@
+"""Кэширование данных приложения blog в кэше Django."""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+FEED_COUNT_TIMEOUT = 60
+FEED_COUNT_GENERATION_KEY = 'blog:feed_count:generation'
+
+FEED_INDEX = 'index'
+FEED_CATEGORY = 'category'
+FEED_AUTHOR_PUBLIC = 'author_public'
+FEED_AUTHOR_OWNER = 'author_owner'
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_PARAMS = ('page', 'after', 'before')
+PAGE_CACHE_HITS_KEY = 'blog:page_cache:hits'
+PAGE_CACHE_MISSES_KEY = 'blog:page_cache:misses'
+PAGE_CACHE_HEADER = 'X-Page-Cache'
+
+
+def get_feed_count_generation():
+    """Функция возвращает текущее поколение счётчиков лент.
+    Смена поколения разом делает недействительными все счётчики."""
+    return cache.get_or_set(FEED_COUNT_GENERATION_KEY, time.time_ns, None)
+
+
+def get_feed_count_key(feed, object_id=None, generation=None):
+    """Функция возвращает ключ кэша с количеством постов в ленте."""
+    if generation is None:
+        generation = get_feed_count_generation()
+    return f'blog:feed_count:{generation}:{feed}:{object_id}'
+
+
+def invalidate_post_feed_counts(author_id, category_ids):
+    """Функция сбрасывает счётчики лент, в которые попадает пост:
+    общей ленты, лент категорий и обеих лент автора."""
+    generation = get_feed_count_generation()
+    keys = [
+        get_feed_count_key(FEED_INDEX, generation=generation),
+        get_feed_count_key(FEED_AUTHOR_PUBLIC, author_id, generation),
+        get_feed_count_key(FEED_AUTHOR_OWNER, author_id, generation),
+    ]
+    keys.extend(
+        get_feed_count_key(FEED_CATEGORY, category_id, generation)
+        for category_id in category_ids if category_id is not None
+    )
+    cache.delete_many(keys)
+
+
+def invalidate_all_feed_counts():
+    """Функция сбрасывает счётчики всех лент сменой поколения."""
+    cache.set(FEED_COUNT_GENERATION_KEY, time.time_ns(), None)
+
+
+def get_tag_versions(tags):
+    """Функция возвращает текущие версии тегов кэша страниц.
+    Тегам без версии присваивается новая версия."""
+    keys = {f'blog:tag:{tag}': tag for tag in tags}
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_tags(*tags):
+    """Функция делает недействительными страницы с любым из тегов."""
+    cache.set_many({f'blog:tag:{tag}': time.time_ns() for tag in tags}, None)
+
+
+def get_post_tags(post):
+    """Функция возвращает теги данных, из которых собирается карточка поста:
+    сам пост, его автор, категория и местоположение."""
+    tags = [f'post:{post.pk}', f'user:{post.author_id}']
+    if post.category_id is not None:
+        tags.append(f'category:{post.category_id}')
+    if post.location_id is not None:
+        tags.append(f'location:{post.location_id}')
+    return tags
+
+
+def get_posts_tags(posts):
+    """Функция возвращает теги всех карточек страницы ленты."""
+    return [tag for post in posts for tag in get_post_tags(post)]
+
+
+def get_comment_page_tags(post, comments):
+    """Функция возвращает теги фрагмента со страницей комментариев:
+    пост и его категория определяют доступ к странице, а комментарии
+    и их авторы — её содержимое. Последняя страница меняется ещё
+    и при добавлении комментария."""
+    tags = [f'post-comments:{post.pk}']
+    if post.category_id is not None:
+        tags.append(f'category:{post.category_id}')
+    for comment in comments:
+        tags.append(f'comment:{comment.pk}')
+        tags.append(f'user:{comment.author_id}')
+    if not comments.has_next():
+        tags.append(f'comments:{post.pk}:tail')
+    return tags
+
+
+def set_post_card_versions(posts):
+    """Функция проставляет постам версию карточки для кэша фрагментов.
+    Версия меняется при изменении поста, его автора, категории
+    или местоположения."""
+    posts = list(posts)
+    versions = get_tag_versions(get_posts_tags(posts))
+    for post in posts:
+        post.card_version = '.'.join(
+            str(versions[tag]) for tag in get_post_tags(post)
+        )
+
+
+def add_page_cache_tags(request, *tags):
+    """Функция привязывает кэшируемую страницу к тегам.
+    Версии тегов читаются до отрисовки, чтобы не закэшировать
+    страницу, данные которой изменились во время её построения."""
+    if getattr(request, '_page_cache_tags', None) is not None:
+        request._page_cache_tags.update(get_tag_versions(tags))
+
+
+def get_page_cache_key(request):
+    """Функция возвращает ключ страницы по пути и параметрам пагинации."""
+    params = '&'.join(
+        f'{name}={request.GET[name]}'
+        for name in PAGE_CACHE_PARAMS if name in request.GET
+    )
+    digest = hashlib.md5(f'{request.path}?{params}'.encode()).hexdigest()
+    return f'blog:page:{digest}'
+
+
+def count_page_cache_access(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def get_page_cache_stats():
+    """Функция возвращает число попаданий и промахов кэша страниц."""
+    stats = cache.get_many((PAGE_CACHE_HITS_KEY, PAGE_CACHE_MISSES_KEY))
+    hits = stats.get(PAGE_CACHE_HITS_KEY, 0)
+    misses = stats.get(PAGE_CACHE_MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def reset_page_cache_stats():
+    cache.delete_many((PAGE_CACHE_HITS_KEY, PAGE_CACHE_MISSES_KEY))
+
+
+def cache_anonymous_page(view_func):
+    """Функция-декоратор кэширует страницу для анонимных читателей.
+
+    Страница кэшируется, только если view привязал её к тегам через
+    add_page_cache_tags. При чтении версии тегов сверяются с текущими,
+    так что изменение любых данных страницы сбрасывает только её.
+
+    Декоратор ставится над conditional_page: попадание в кэш не ходит
+    в базу, а условный запрос сверяется с ETag и Last-Modified,
+    сохранёнными вместе со страницей."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        key = get_page_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            response, tag_versions = entry
+            if get_tag_versions(tag_versions) == tag_versions:
+                count_page_cache_access(PAGE_CACHE_HITS_KEY)
+                response[PAGE_CACHE_HEADER] = 'HIT'
+                return get_conditional_response(
+                    request,
+                    etag=response.get('ETag'),
+                    last_modified=parse_http_date_safe(
+                        response.get('Last-Modified', '')
+                    ),
+                    response=response
+                )
+        count_page_cache_access(PAGE_CACHE_MISSES_KEY)
+
+        request._page_cache_tags = {}
+        response = view_func(request, *args, **kwargs)
+        if (response.status_code == 200
+           and not response.streaming
+           and request._page_cache_tags
+           and not request.META.get('CSRF_COOKIE_USED')):
+            response[PAGE_CACHE_HEADER] = 'MISS'
+            cache.set(key, (response, request._page_cache_tags),
+                      PAGE_CACHE_TIMEOUT)
+        return response
+    return wrapper
@@ -0,0 +1,78 @@
+"""Условные GET-запросы (ETag и Last-Modified) для страниц блога."""
+import hashlib
+from datetime import datetime, timezone
+
+from django.db.models import Max
+from django.views.decorators.http import condition
+
+from blog.caching import get_tag_versions
+from blog.models import Category, Location
+
+
+def get_reference_last_modified():
+    """Функция возвращает время последнего изменения справочников,
+    которые выводятся в карточках постов: категорий и местоположений."""
+    return max(
+        filter(None, (
+            Category.objects.aggregate(last=Max('updated_at'))['last'],
+            Location.objects.aggregate(last=Max('updated_at'))['last'],
+        )),
+        default=None
+    )
+
+
+def get_tags_last_modified(versions):
+    """Функция переводит версии тегов в время последнего сброса:
+    версия тега — момент сброса в наносекундах. Так Last-Modified
+    меняется и при удалении постов или комментариев и при смене
+    данных автора, которые не отражаются на updated_at."""
+    if not versions:
+        return None
+    return datetime.fromtimestamp(max(versions) / 10 ** 9, tz=timezone.utc)
+
+
+def get_feed_state(posts_queryset, *tags):
+    """Функция возвращает состояние ленты: время последнего изменения
+    её постов, справочников и тегов ленты и версии тегов ленты."""
+    versions = get_tag_versions(tags)
+    etag_parts = [versions[tag] for tag in tags]
+    last_modified = max(
+        filter(None, (
+            posts_queryset.order_by().aggregate(
+                last=Max('updated_at')
+            )['last'],
+            get_reference_last_modified(),
+            get_tags_last_modified(etag_parts),
+        )),
+        default=None
+    )
+    return last_modified, etag_parts
+
+
+def conditional_page(state_func):
+    """Функция-декоратор отвечает 304 Not Modified, если страница
+    не изменилась, до запуска view и отрисовки шаблона.
+
+    state_func(request, *args, **kwargs) возвращает пару
+    (last_modified, etag_parts) или None, если проверку делать нельзя.
+    ETag учитывает пользователя: страницы отличаются для разных читателей."""
+    def get_state(request, *args, **kwargs):
+        if not hasattr(request, '_conditional_state'):
+            request._conditional_state = state_func(request, *args, **kwargs)
+        return request._conditional_state
+
+    def get_etag(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        if state is None:
+            return None
+        last_modified, etag_parts = state
+        raw = ':'.join(
+            str(part) for part in (request.user.pk, last_modified, *etag_parts)
+        )
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def get_last_modified(request, *args, **kwargs):
+        state = get_state(request, *args, **kwargs)
+        return state[0] if state is not None else None
+
+    return condition(etag_func=get_etag, last_modified_func=get_last_modified)
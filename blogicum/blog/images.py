@@ -0,0 +1,145 @@
+"""Подготовка уменьшенных вариантов изображений публикаций."""
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from blog.models import ImageRendition, Post
+
+logger = logging.getLogger(__name__)
+
+# Ширина карточки в ленте и ширина для экранов с двойной плотностью.
+RENDITION_WIDTHS = (640, 1280)
+RENDITION_FORMAT = 'WEBP'
+RENDITION_EXTENSION = 'webp'
+RENDITION_QUALITY = 80
+# Хранилище называет файлы по хешу содержимого, от имени при
+# сохранении остаются только каталог и расширение.
+RENDITION_NAME = f'blog_images/renditions/rendition.{RENDITION_EXTENSION}'
+IMAGE_ERRORS = (OSError, UnidentifiedImageError, Image.DecompressionBombError)
+NORMALIZE_OPTIONS = {
+    'JPEG': {'quality': 90, 'optimize': True},
+    'PNG': {'optimize': True},
+}
+
+
+def normalize_image(image_file):
+    """Функция поворачивает исходник по EXIF, перекодирует его в том же
+    формате без метаданных и возвращает имя нового файла. Исходник не
+    удаляется: в хранилище по содержимому он может принадлежать другим
+    постам. Анимированные изображения не трогаются."""
+    storage = image_file.storage
+    with image_file.open('rb'):
+        image = Image.open(image_file)
+        image_format = image.format
+        if getattr(image, 'is_animated', False):
+            return image_file.name
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, image_format, **NORMALIZE_OPTIONS.get(image_format, {}))
+    return storage.save(image_file.name, ContentFile(buffer.getvalue()))
+
+
+def make_renditions(image_file):
+    """Функция сохраняет варианты изображения фиксированной ширины
+    в формате WebP и возвращает их описание: имя, ширину и высоту.
+
+    Исходник шире варианта не растягивается, поэтому узкое изображение
+    даёт один вариант в собственную ширину."""
+    storage = image_file.storage
+    with image_file.open('rb'):
+        image = Image.open(image_file)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    renditions = []
+    widths = {min(width, image.width) for width in RENDITION_WIDTHS}
+    for width in sorted(widths):
+        height = max(round(image.height * width / image.width), 1)
+        buffer = BytesIO()
+        image.resize((width, height), Image.LANCZOS).save(
+            buffer,
+            RENDITION_FORMAT,
+            quality=RENDITION_QUALITY
+        )
+        renditions.append({
+            'name': storage.save(
+                RENDITION_NAME,
+                ContentFile(buffer.getvalue())
+            ),
+            'width': width,
+            'height': height,
+        })
+    return renditions
+
+
+def make_renditions_safely(image_file):
+    """Функция готовит варианты изображения. Если файл не читается или
+    не является изображением, возвращается пустой список и в шаблонах
+    выводится исходник."""
+    try:
+        return make_renditions(image_file)
+    except IMAGE_ERRORS:
+        logger.warning('Не удалось подготовить варианты изображения %s',
+                       image_file.name, exc_info=True)
+        return []
+
+
+def store_uploaded_image(post):
+    """Функция записывает загруженное изображение поста в хранилище
+    заранее, как это сделал бы pre_save поля: тогда хеширование
+    и запись файла не попадают в очередь записи в базу."""
+    if post.image and not post.image._committed:
+        post.image.save(post.image.name, post.image.file, save=False)
+
+
+def save_rendition_names(post_id, renditions):
+    """Функция заменяет имена файлов вариантов изображения поста
+    в ImageRendition. Вызывается при каждом изменении image_renditions."""
+    ImageRendition.objects.filter(post_id=post_id).delete()
+    ImageRendition.objects.bulk_create(
+        ImageRendition(post_id=post_id, name=rendition['name'])
+        for rendition in renditions
+    )
+
+
+def get_referenced_names(names):
+    """Функция возвращает те из имён файлов, на которые ещё ссылается
+    хотя бы один пост: как на изображение или как на его вариант."""
+    names = set(filter(None, names))
+    referenced = set(Post.objects.filter(image__in=names).values_list(
+        'image',
+        flat=True
+    ))
+    referenced.update(ImageRendition.objects.filter(
+        name__in=names - referenced
+    ).values_list('name', flat=True))
+    return referenced
+
+
+def delete_unreferenced_files(storage, names):
+    for name in names - get_referenced_names(names):
+        storage.delete(name)
+
+
+def release_image_files(storage, image_name='', renditions=()):
+    """Функция удаляет изображение и его варианты, если на них больше
+    не ссылается ни один пост. Одинаковые загрузки хранятся одним
+    файлом, поэтому удалять файл вместе с постом нельзя.
+
+    Удаление откладывается до фиксации транзакции: при откате или
+    повторе записи пост вернётся вместе с файлом, а ссылки
+    проверяются по уже зафиксированным данным."""
+    names = {image_name, *(rendition['name'] for rendition in renditions)}
+    names.discard('')
+    if names:
+        transaction.on_commit(
+            lambda: delete_unreferenced_files(storage, names)
+        )
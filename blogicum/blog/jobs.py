@@ -0,0 +1,128 @@
+"""Фоновая обработка изображений публикаций."""
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from blog.caching import invalidate_tags
+from blog.images import (
+    IMAGE_ERRORS,
+    make_renditions,
+    normalize_image,
+    release_image_files,
+    save_rendition_names
+)
+from blog.models import ImageJob, Post
+
+logger = logging.getLogger(__name__)
+
+# Статус для задания, которое удалили вместе с постом после того,
+# как обработчик взял его из очереди.
+JOB_MISSING = 'missing'
+# Сколько раз задание возвращается в очередь после аварии процесса.
+MAX_ATTEMPTS = 3
+
+
+def enqueue_image_job(post):
+    """Функция ставит в очередь обработку текущего изображения поста.
+    Ожидающие задания для прежнего изображения снимаются."""
+    ImageJob.objects.filter(post=post, status=ImageJob.PENDING).delete()
+    return ImageJob.objects.create(post=post, image_name=post.image.name)
+
+
+def claim_image_jobs(limit):
+    """Функция забирает из очереди до limit заданий и возвращает их id.
+    Задание считается взятым, только если его статус удалось сменить,
+    поэтому несколько обработчиков не возьмут одно задание дважды."""
+    claimed = []
+    pending = ImageJob.objects.filter(status=ImageJob.PENDING).values_list(
+        'pk', flat=True
+    )[:limit]
+    for job_id in pending:
+        is_claimed = ImageJob.objects.filter(
+            pk=job_id,
+            status=ImageJob.PENDING
+        ).update(
+            status=ImageJob.RUNNING,
+            attempts=F('attempts') + 1,
+            updated_at=timezone.now()
+        )
+        if is_claimed:
+            claimed.append(job_id)
+    return claimed
+
+
+def fail_image_job(job_id, error, retry=False):
+    """Функция помечает взятое задание ошибочным. При retry задание
+    возвращается в очередь, пока не исчерпаны попытки."""
+    job = ImageJob.objects.filter(pk=job_id, status=ImageJob.RUNNING)
+    if retry and job.filter(attempts__lt=MAX_ATTEMPTS).update(
+        status=ImageJob.PENDING,
+        updated_at=timezone.now()
+    ):
+        return ImageJob.PENDING
+    job.update(
+        status=ImageJob.FAILED,
+        error=f'{type(error).__name__}: {error}',
+        updated_at=timezone.now()
+    )
+    return ImageJob.FAILED
+
+
+def run_image_job(job_id):
+    """Функция выполняет задание и возвращает его статус. Задание
+    удалённого поста пропускается, а неожиданная ошибка отмечает
+    задание ошибочным, не останавливая обработчик."""
+    job = ImageJob.objects.select_related('post').filter(pk=job_id).first()
+    if job is None:
+        return JOB_MISSING
+    try:
+        return process_image_job(job)
+    except Exception as error:
+        logger.exception('Задание %s завершилось ошибкой', job_id)
+        return fail_image_job(job_id, error)
+
+
+def process_image_job(job):
+    """Функция обрабатывает изображение поста: поворачивает по EXIF,
+    удаляет метаданные и готовит уменьшенные варианты."""
+    post = job.post
+    if post.image.name != job.image_name:
+        job.status = ImageJob.DONE
+        job.error = 'Изображение поста сменилось.'
+        job.save(update_fields=('status', 'error', 'updated_at'))
+        return job.status
+
+    storage = post.image.storage
+    try:
+        post.image.name = normalize_image(post.image)
+        renditions = make_renditions(post.image)
+    except IMAGE_ERRORS as error:
+        logger.warning('Не удалось обработать изображение %s',
+                       job.image_name, exc_info=True)
+        job.status = ImageJob.FAILED
+        job.error = f'{type(error).__name__}: {error}'
+        job.save(update_fields=('status', 'error', 'updated_at'))
+        return job.status
+
+    with transaction.atomic():
+        is_updated = Post.objects.filter(
+            pk=post.pk,
+            image=job.image_name
+        ).update(
+            image=post.image.name,
+            image_renditions=renditions,
+            updated_at=timezone.now()
+        )
+        if is_updated:
+            save_rendition_names(post.pk, renditions)
+    if is_updated:
+        release_image_files(storage, job.image_name)
+        invalidate_tags(f'post:{post.pk}')
+    else:
+        # Изображение сменили во время обработки.
+        release_image_files(storage, post.image.name, renditions)
+    job.status = ImageJob.DONE
+    job.save(update_fields=('status', 'updated_at'))
+    return job.status
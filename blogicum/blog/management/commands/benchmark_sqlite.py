@@ -0,0 +1,133 @@
+"""Нагрузочное сравнение SQLite с настройками по умолчанию и с PRAGMA."""
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blogicum.sqlite3.base import DEFAULT_PRAGMAS, apply_pragmas
+
+DEFAULT_WORKERS = 4
+DEFAULT_DURATION = 5.0
+DEFAULT_WRITE_RATIO = 0.2
+INITIAL_ROWS = 10000
+# Python по умолчанию ждёт блокировку 5 секунд, как и Django.
+DEFAULT_TIMEOUT = 5.0
+
+
+def run_worker(path, pragmas, duration, write_ratio, seed):
+    """Функция читает и пишет в базу до истечения duration секунд
+    и возвращает количество чтений, записей, ошибок и суммарное
+    время ожидания записей."""
+    connection = sqlite3.connect(
+        path,
+        timeout=DEFAULT_TIMEOUT,
+        isolation_level=None
+    )
+    apply_pragmas(connection, pragmas)
+    generator = random.Random(seed)
+    reads = writes = errors = 0
+    write_time = 0.0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            if generator.random() < write_ratio:
+                started = time.monotonic()
+                connection.execute(
+                    'INSERT INTO item (text) VALUES (?)',
+                    ('x' * generator.randint(50, 500),)
+                )
+                write_time += time.monotonic() - started
+                writes += 1
+            else:
+                connection.execute(
+                    'SELECT id, text FROM item WHERE id >= ? '
+                    'ORDER BY id LIMIT 10',
+                    (generator.randint(1, INITIAL_ROWS),)
+                ).fetchall()
+                reads += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    connection.close()
+    return reads, writes, errors, write_time
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite под параллельной '
+            'нагрузкой без настроек и с PRAGMA из DATABASES.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=DEFAULT_WORKERS,
+            help='Количество параллельных процессов.'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=DEFAULT_DURATION,
+            help='Длительность каждого прогона в секундах.'
+        )
+        parser.add_argument(
+            '--write-ratio',
+            type=float,
+            default=DEFAULT_WRITE_RATIO,
+            help='Доля операций записи.'
+        )
+
+    def handle(self, *args, **options):
+        tuned = settings.DATABASES['default'].get('OPTIONS', {}).get(
+            'pragmas',
+            DEFAULT_PRAGMAS
+        )
+        scenarios = (
+            ('по умолчанию', {}),
+            ('с PRAGMA', tuned),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for title, pragmas in scenarios:
+                path = str(Path(directory) / f'{len(pragmas)}.sqlite3')
+                self.prepare_database(path)
+                self.report(title, self.run(path, pragmas, options))
+
+    def prepare_database(self, path):
+        connection = sqlite3.connect(path, isolation_level=None)
+        connection.execute(
+            'CREATE TABLE item (id INTEGER PRIMARY KEY, text TEXT)'
+        )
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO item (text) VALUES (?)',
+            (('x' * 200,) for _ in range(INITIAL_ROWS))
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def run(self, path, pragmas, options):
+        workers = options['workers']
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                run_worker,
+                [path] * workers,
+                [pragmas] * workers,
+                [options['duration']] * workers,
+                [options['write_ratio']] * workers,
+                range(workers)
+            ))
+        totals = [sum(values) for values in zip(*results)]
+        return totals, options['duration']
+
+    def report(self, title, result):
+        (reads, writes, errors, write_time), duration = result
+        average_wait = write_time / writes * 1000 if writes else 0
+        self.stdout.write(
+            f'{title}: чтений {reads / duration:.0f}/с, '
+            f'записей {writes / duration:.0f}/с, '
+            f'ошибок {errors}, '
+            f'среднее время записи {average_wait:.1f} мс'
+        )
@@ -0,0 +1,77 @@
+"""Удаление файлов изображений, на которые не ссылается ни один пост."""
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.models import ImageJob, ImageRendition, Post
+from blog.storage import get_post_image_storage
+
+IMAGES_DIR = 'blog_images'
+DEFAULT_MIN_AGE = 3600
+
+
+def walk_files(storage, directory):
+    """Функция обходит каталог хранилища и возвращает имена файлов."""
+    directories, files = storage.listdir(directory)
+    for filename in files:
+        yield posixpath.join(directory, filename)
+    for subdirectory in directories:
+        yield from walk_files(storage, posixpath.join(directory, subdirectory))
+
+
+def get_referenced_names():
+    """Функция возвращает имена всех файлов, на которые ссылаются посты
+    и задания обработки изображений."""
+    referenced = set(ImageJob.objects.filter(
+        status__in=(ImageJob.PENDING, ImageJob.RUNNING)
+    ).values_list('image_name', flat=True))
+    referenced.update(
+        Post.objects.exclude(image='').values_list('image', flat=True)
+    )
+    referenced.update(
+        ImageRendition.objects.values_list('name', flat=True)
+    )
+    return referenced
+
+
+class Command(BaseCommand):
+    help = ('Удаляет изображения и их варианты, на которые больше '
+            'не ссылается ни одна публикация.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=DEFAULT_MIN_AGE,
+            help=('Возраст файла в секундах, после которого он может быть '
+                  'удалён. Защищает только что загруженные файлы, пост '
+                  'которых ещё не сохранён.')
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести файлы, которые были бы удалены.'
+        )
+
+    def handle(self, *args, **options):
+        storage = get_post_image_storage()
+        if not storage.exists(IMAGES_DIR):
+            return
+        referenced = get_referenced_names()
+        threshold = timezone.now() - timedelta(seconds=options['min_age'])
+        removed = 0
+        for name in walk_files(storage, IMAGES_DIR):
+            if name in referenced:
+                continue
+            if storage.get_modified_time(name) > threshold:
+                continue
+            if options['dry_run']:
+                self.stdout.write(name)
+            else:
+                storage.delete(name)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов без ссылок: {removed}'
+        ))
@@ -0,0 +1,33 @@
+"""Копирование основной базы SQLite в файл реплики."""
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blogicum.routers import PRIMARY_DATABASE, REPLICA_DATABASE
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу в базу replica. Копия заменяет '
+            'реплику при локальном запуске и в тестовых стендах.')
+
+    def handle(self, *args, **options):
+        if connections[PRIMARY_DATABASE].vendor != 'sqlite':
+            raise CommandError(
+                'Команда копирует только базу SQLite. Реплику PostgreSQL '
+                'поддерживает потоковая репликация сервера.'
+            )
+        primary = sqlite3.connect(
+            str(settings.DATABASES[PRIMARY_DATABASE]['NAME'])
+        )
+        replica = sqlite3.connect(
+            str(settings.DATABASES[REPLICA_DATABASE]['NAME'])
+        )
+        # Резервное копирование SQLite делает согласованный снимок,
+        # не останавливая запись в основную базу.
+        with replica:
+            primary.backup(replica)
+        replica.close()
+        primary.close()
+        self.stdout.write(self.style.SUCCESS('Реплика обновлена.'))
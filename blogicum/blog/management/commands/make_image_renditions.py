@@ -0,0 +1,56 @@
+"""Подготовка вариантов изображений для уже загруженных публикаций."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.images import (
+    make_renditions_safely,
+    release_image_files,
+    save_rendition_names
+)
+from blog.models import Post
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = ('Готовит уменьшенные варианты изображений публикаций, '
+            'у которых их ещё нет.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать варианты и для публикаций, где они уже есть.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество публикаций, читаемых из базы за один запрос.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'pk', 'image', 'image_renditions'
+        ).order_by('pk')
+        processed = failed = 0
+        for post in posts.iterator(chunk_size=options['batch_size']):
+            if post.image_renditions and not options['force']:
+                continue
+            renditions = make_renditions_safely(post.image)
+            with transaction.atomic():
+                Post.objects.filter(pk=post.pk).update(
+                    image_renditions=renditions,
+                    updated_at=timezone.now()
+                )
+                save_rendition_names(post.pk, renditions)
+            release_image_files(
+                post.image.storage,
+                renditions=post.image_renditions
+            )
+            processed += 1
+            failed += not renditions
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано публикаций: {processed}, с ошибками: {failed}'
+        ))
@@ -0,0 +1,24 @@
+"""Статистика кэша страниц для анонимных читателей."""
+from django.core.management.base import BaseCommand
+
+from blog.caching import get_page_cache_stats, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает число попаданий и промахов кэша страниц блога.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        stats = get_page_cache_stats()
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, '
+            f'доля попаданий: {stats["hit_rate"]:.1%}'
+        )
+        if options['reset']:
+            reset_page_cache_stats()
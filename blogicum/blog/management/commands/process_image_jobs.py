@@ -0,0 +1,104 @@
+"""Обработчик очереди изображений публикаций."""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from blog.jobs import claim_image_jobs, fail_image_job
+from blog.models import ImageJob
+from blog.worker import init_worker_process, run_image_job
+
+DEFAULT_INTERVAL = 2
+
+
+class Command(BaseCommand):
+    help = ('Обрабатывает очередь изображений публикаций в пуле процессов: '
+            'поворот по EXIF, удаление метаданных и уменьшенные варианты.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Размер пула процессов; 0 — обрабатывать в этом процессе.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь и завершиться.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_INTERVAL,
+            help='Пауза между проверками пустой очереди в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        # Обработчик на сервере один, поэтому задания, прерванные
+        # его остановкой, возвращаются в очередь.
+        ImageJob.objects.filter(status=ImageJob.RUNNING).update(
+            status=ImageJob.PENDING
+        )
+        workers = options['workers']
+        if not workers:
+            self.process(self.run_in_process, 1, options)
+            return
+        while True:
+            # spawn не наследует открытые соединения с базой родителя.
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker_process
+            ) as executor:
+                try:
+                    self.process(
+                        partial(self.run_in_pool, executor),
+                        workers,
+                        options
+                    )
+                    return
+                except BrokenProcessPool:
+                    self.stderr.write(
+                        'Процесс пула аварийно завершился, '
+                        'пул запускается заново.'
+                    )
+
+    def run_in_process(self, job_ids):
+        for job_id in job_ids:
+            yield job_id, run_image_job(job_id)
+
+    def run_in_pool(self, executor, job_ids):
+        """Метод выполняет задания в пуле. Ошибка одного задания
+        отмечает только его; если процесс пула упал, например из-за
+        нехватки памяти, задания пачки возвращаются в очередь, пока
+        не исчерпают попытки, а пул перезапускается."""
+        futures = [executor.submit(run_image_job, job_id)
+                   for job_id in job_ids]
+        broken = None
+        for job_id, future in zip(job_ids, futures):
+            try:
+                status = future.result()
+            except BrokenProcessPool as error:
+                broken = error
+                status = fail_image_job(job_id, error, retry=True)
+            except Exception as error:
+                status = fail_image_job(job_id, error)
+            yield job_id, status
+        if broken is not None:
+            raise broken
+
+    def process(self, run_jobs, batch_size, options):
+        while True:
+            job_ids = claim_image_jobs(batch_size)
+            for job_id, status in run_jobs(job_ids):
+                self.stdout.write(f'Задание {job_id}: {status}')
+            if job_ids:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+"""Публикация отложенных постов по наступлении даты публикации."""
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.scheduler import get_next_release_date, release_due_posts
+
+DEFAULT_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = ('Выпускает отложенные публикации, у которых наступила дата '
+            'публикации. С флагом --loop работает постоянно.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, а ждать следующих отложенных публикаций.'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=DEFAULT_INTERVAL,
+            help='Наибольшая пауза между проверками в секундах.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            released = release_due_posts()
+            if released:
+                self.stdout.write(f'Опубликовано постов: {released}')
+            if not options['loop']:
+                break
+            time.sleep(self.get_sleep_seconds(options['interval']))
+
+    @staticmethod
+    def get_sleep_seconds(interval):
+        """Спит до ближайшей отложенной публикации, но не дольше interval."""
+        next_release = get_next_release_date()
+        if next_release is None:
+            return interval
+        seconds = (next_release - timezone.now()).total_seconds()
+        return min(max(seconds, 0), interval)
@@ -0,0 +1,59 @@
+"""Перестроение полнотекстового индекса публикаций."""
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from blog.models import Post
+from blog.search import SEARCH_TABLE, delete_orphans, reindex_batch
+
+DEFAULT_BATCH_SIZE = 500
+POSTGRES_SEARCH_INDEX = 'post_visible_search_gin_idx'
+
+
+class Command(BaseCommand):
+    help = ('Заново индексирует заголовки и тексты публикаций для поиска '
+            'пачками, не блокируя запись надолго.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Количество публикаций, индексируемых в одной транзакции.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'postgresql':
+            # GIN-индекс PostgreSQL обновляется сам, перестроение
+            # только убирает разросшиеся страницы.
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'REINDEX INDEX CONCURRENTLY {POSTGRES_SEARCH_INDEX}'
+                )
+            self.stdout.write(self.style.SUCCESS('Индекс перестроен.'))
+            return
+
+        batch_size = options['batch_size']
+        last_pk = 0
+        indexed = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic(), connection.cursor() as cursor:
+                reindex_batch(cursor, last_pk, batch[-1])
+            indexed += len(batch)
+            last_pk = batch[-1]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            removed = delete_orphans(cursor)
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) "
+                "VALUES ('optimize')"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано публикаций: {indexed}, '
+            f'удалено устаревших записей: {removed}'
+        ))
@@ -0,0 +1,26 @@
+"""Статистика очереди записи в базу."""
+from django.core.management.base import BaseCommand
+
+from blog.writes import get_write_stats, reset_write_stats
+
+
+class Command(BaseCommand):
+    help = ('Показывает длину очереди записи, среднее ожидание блокировки '
+            'и число повторов и отказов из-за занятой базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, **options):
+        stats = get_write_stats()
+        self.stdout.write(
+            f'В очереди: {stats["depth"]}, записей: {stats["writes"]}, '
+            f'среднее ожидание: {stats["average_wait_ms"]:.1f} мс, '
+            f'повторов: {stats["retries"]}, отказов: {stats["rejected"]}'
+        )
+        if options['reset']:
+            reset_write_stats()
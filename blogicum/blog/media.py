@@ -0,0 +1,47 @@
+"""Передача медиафайлов клиенту."""
+import mimetypes
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+
+ACCEL_REDIRECT_HEADER = 'X-Accel-Redirect'
+DEFAULT_ACCEL_PREFIX = '/protected-media/'
+
+
+def get_accel_value(header, path):
+    """Функция возвращает значение заголовка для веб-сервера или None,
+    если файл нельзя передать через него.
+
+    nginx получает адрес во внутреннем location, который отображается
+    на MEDIA_ROOT, а Apache и lighttpd — абсолютный путь к файлу."""
+    if header != ACCEL_REDIRECT_HEADER:
+        return str(path)
+    try:
+        relative = path.relative_to(Path(settings.MEDIA_ROOT).resolve())
+    except ValueError:
+        return None
+    prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', DEFAULT_ACCEL_PREFIX)
+    return prefix.rstrip('/') + '/' + quote(relative.as_posix())
+
+
+def send_media_file(path, content_type=None):
+    """Функция отвечает содержимым файла после всех проверок доступа.
+
+    Если задан MEDIA_ACCEL_HEADER, сама передача поручается веб-серверу
+    и процесс Django сразу освобождается. Иначе файл отдаёт FileResponse,
+    который сервер приложения передаёт через sendfile, если умеет."""
+    path = Path(path).resolve()
+    content_type = (
+        content_type
+        or mimetypes.guess_type(path.name)[0]
+        or 'application/octet-stream'
+    )
+    header = getattr(settings, 'MEDIA_ACCEL_HEADER', None)
+    value = header and get_accel_value(header, path)
+    if value:
+        response = HttpResponse(content_type=content_type)
+        response[header] = value
+        return response
+    return FileResponse(open(path, 'rb'), content_type=content_type)
@@ -0,0 +1,25 @@
+# Generated by Django 3.2.16 on 2026-10-17 05:59
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_is_released(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(pub_date__lte=timezone.now()).update(is_released=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_released',
+            field=models.BooleanField(default=False, editable=False, help_text='Выставляется при сохранении и командой publish_scheduled для отложенных публикаций.', verbose_name='Дата публикации наступила'),
+        ),
+        migrations.RunPython(fill_is_released, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=list, editable=False, verbose_name='Варианты изображения'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:10
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_imagejob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=blog.storage.get_post_image_storage, upload_to='blog_images', verbose_name='Изображение'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+"""Индексы, которые поддерживает только PostgreSQL.
+
+На SQLite миграция ничего не делает: там ленты обслуживают частичные
+индексы из Meta моделей. Индексы строятся CREATE INDEX CONCURRENTLY,
+чтобы не блокировать запись в рабочую базу, поэтому миграция
+выполняется вне транзакции."""
+from django.db import migrations
+
+# Конфигурация полнотекстового поиска: тексты блога на русском.
+SEARCH_CONFIG = 'russian'
+
+POSTGRES_INDEXES = (
+    # Лента и её keyset-пагинация: порядок (pub_date, id) по видимым
+    # постам, а колонки карточки в INCLUDE позволяют считать и
+    # листать ленту без обращения к таблице.
+    (
+        'post_visible_feed_cover_idx',
+        'ON blog_post (pub_date DESC, id DESC) '
+        'INCLUDE (author_id, category_id, location_id, comment_count) '
+        'WHERE is_visible',
+    ),
+    (
+        'post_visible_category_cover_idx',
+        'ON blog_post (category_id, pub_date DESC, id DESC) '
+        'INCLUDE (author_id, location_id, comment_count) '
+        'WHERE is_visible',
+    ),
+    # Страницы комментариев идут курсором по (created_at, id).
+    (
+        'comment_post_page_cover_idx',
+        'ON blog_comment (post_id, created_at, id) INCLUDE (author_id)',
+    ),
+    # Поиск по заголовку и тексту видимых постов. Запрос должен
+    # повторять выражение индекса, иначе планировщик его не выберет.
+    (
+        'post_visible_search_gin_idx',
+        'ON blog_post USING gin ('
+        f"to_tsvector('{SEARCH_CONFIG}', title || ' ' || text)"
+        ') WHERE is_visible',
+    ),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, definition in POSTGRES_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in POSTGRES_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0020_post_image_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
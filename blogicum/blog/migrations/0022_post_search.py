@@ -0,0 +1,61 @@
+"""Полнотекстовый индекс FTS5 по заголовку и тексту постов.
+
+Таблица хранит собственную копию заголовка и текста, поэтому записи
+можно удалять по rowid без исходных значений. Триггеры обновляют её
+при любом изменении blog_post, в том числе через QuerySet.update().
+В PostgreSQL поиск использует GIN-индекс из 0021_postgres_indexes."""
+from django.db import migrations
+
+SQLITE_STATEMENTS = (
+    'CREATE VIRTUAL TABLE blog_post_search USING fts5('
+    "title, text, tokenize = 'unicode61 remove_diacritics 2')",
+    'CREATE TRIGGER blog_post_search_insert AFTER INSERT ON blog_post '
+    'BEGIN '
+    'INSERT INTO blog_post_search (rowid, title, text) '
+    'VALUES (new.id, new.title, new.text); '
+    'END',
+    'CREATE TRIGGER blog_post_search_update '
+    'AFTER UPDATE OF title, text ON blog_post '
+    'BEGIN '
+    'DELETE FROM blog_post_search WHERE rowid = old.id; '
+    'INSERT INTO blog_post_search (rowid, title, text) '
+    'VALUES (new.id, new.title, new.text); '
+    'END',
+    'CREATE TRIGGER blog_post_search_delete AFTER DELETE ON blog_post '
+    'BEGIN '
+    'DELETE FROM blog_post_search WHERE rowid = old.id; '
+    'END',
+    'INSERT INTO blog_post_search (rowid, title, text) '
+    'SELECT id, title, text FROM blog_post',
+)
+SQLITE_REVERSE_STATEMENTS = (
+    'DROP TRIGGER IF EXISTS blog_post_search_insert',
+    'DROP TRIGGER IF EXISTS blog_post_search_update',
+    'DROP TRIGGER IF EXISTS blog_post_search_delete',
+    'DROP TABLE IF EXISTS blog_post_search',
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLITE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLITE_REVERSE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0021_postgres_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
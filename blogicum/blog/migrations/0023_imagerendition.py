@@ -0,0 +1,44 @@
+# Generated by Django 3.2.16 on 2026-10-17 06:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_rendition_names(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    ImageRendition = apps.get_model('blog', 'ImageRendition')
+    posts = Post.objects.exclude(image_renditions=[]).values_list(
+        'pk',
+        'image_renditions'
+    )
+    ImageRendition.objects.bulk_create(
+        (
+            ImageRendition(post_id=pk, name=rendition['name'])
+            for pk, renditions in posts.iterator()
+            for rendition in renditions
+        ),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0022_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=100, verbose_name='Файл варианта')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rendition_files', to='blog.post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'вариант изображения',
+                'verbose_name_plural': 'Варианты изображений',
+            },
+        ),
+        migrations.RunPython(fill_rendition_names, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,11 @@
+from pathlib import PurePosixPath
+
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.storage import get_post_image_storage
 
 ADMIN_MODEL_TITLE_CUT = 20
 ADMIN_MODEL_COMMENT_CUT = 50
@@ -22,6 +28,10 @@ class BaseModel(models.Model):
         'Добавлено',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True
+    )
 
     class Meta:
         abstract = True
@@ -95,17 +105,134 @@ class Post(BaseModel):
     image = models.ImageField(
         'Изображение',
         upload_to='blog_images',
-        blank=True
+        storage=get_post_image_storage,
+        blank=True,
+        db_index=True
+    )
+    image_renditions = models.JSONField(
+        'Варианты изображения',
+        default=list,
+        blank=True,
+        editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False
+    )
+    is_released = models.BooleanField(
+        'Дата публикации наступила',
+        default=False,
+        editable=False,
+        help_text=('Выставляется при сохранении и командой '
+                   'publish_scheduled для отложенных публикаций.')
+    )
+    is_visible = models.BooleanField(
+        'Виден читателям',
+        default=False,
+        editable=False,
+        help_text=('Пост опубликован, дата публикации наступила '
+                   'и категория опубликована.')
     )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=models.Q(is_visible=True),
+                name='post_visible_pub_date_idx'
+            ),
+            models.Index(
+                fields=('updated_at',),
+                condition=models.Q(is_visible=True),
+                name='post_visible_updated_at_idx'
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                name='post_category_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return get_formatted_description(self.title, ADMIN_MODEL_TITLE_CUT)
 
+    @property
+    def image_sources(self):
+        """Готовые варианты изображения с адресом, шириной и высотой."""
+        return [
+            {
+                'url': self.image.storage.url(rendition['name']),
+                'width': rendition['width'],
+                'height': rendition['height'],
+            }
+            for rendition in self.image_renditions
+        ]
+
+    @property
+    def image_key(self):
+        """Ключ изображения для адресов уменьшенных копий. В хранилище
+        по содержимому это хеш файла, поэтому при замене изображения
+        адрес меняется и копию можно кэшировать бессрочно."""
+        return PurePosixPath(self.image.name).stem
+
+    def get_image_url(self, width, image_format='webp'):
+        """Адрес копии изображения заданной ширины и формата."""
+        return reverse('blog:post_image', kwargs={
+            'post_id': self.pk,
+            'image_key': self.image_key,
+            'width': width,
+            'image_format': image_format,
+        })
+
+    @property
+    def image_srcset(self):
+        return ', '.join(
+            f'{source["url"]} {source["width"]}w'
+            for source in self.image_sources
+        )
+
+    def save(self, *args, **kwargs):
+        """Признаки выхода и видимости пересчитываются при каждом
+        сохранении и сохраняются, даже если передан update_fields.
+        Отложенные посты выходят по команде publish_scheduled."""
+        self.is_released = self.pub_date <= timezone.now()
+        self.is_visible = (
+            self.is_published
+            and self.is_released
+            and self.category_id is not None
+            and Category.objects.filter(
+                pk=self.category_id,
+                is_published=True
+            ).exists()
+        )
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'is_released', 'is_visible'
+            }
+        super().save(*args, **kwargs)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        """Счётчик комментариев меняется только сигналами через F(),
+        поэтому при обновлении поста без update_fields он
+        не перезаписывается значением из памяти."""
+        if update_fields is None:
+            values = [
+                value for value in values
+                if value[0].name != 'comment_count'
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
 
 class Comment(BaseModel):
     text = models.TextField('Текст')
@@ -124,6 +251,85 @@ class Comment(BaseModel):
     class Meta:
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_at_idx'
+            ),
+        )
 
     def __str__(self):
         return get_formatted_description(self.text, ADMIN_MODEL_COMMENT_CUT)
+
+
+class ImageJob(models.Model):
+    """Задание фоновой обработки изображения публикации."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        related_name='image_jobs',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    image_name = models.CharField(
+        'Файл изображения',
+        max_length=100,
+        help_text='Если изображение поста сменилось, задание пропускается.'
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField('Изменено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at'),
+                name='imagejob_status_created_at_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.image_name} ({self.get_status_display()})'
+
+
+class ImageRendition(models.Model):
+    """Файл уменьшенного варианта изображения поста. Дублирует имена
+    из Post.image_renditions, чтобы по имени файла быстро найти посты,
+    которые на него ссылаются."""
+
+    post = models.ForeignKey(
+        Post,
+        related_name='rendition_files',
+        on_delete=models.CASCADE,
+        verbose_name='Пост'
+    )
+    name = models.CharField('Файл варианта', max_length=100, db_index=True)
+
+    class Meta:
+        verbose_name = 'вариант изображения'
+        verbose_name_plural = 'Варианты изображений'
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,167 @@
+"""Постраничный вывод публикаций и комментариев по ключу (дата, id)."""
+import base64
+import binascii
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from blog.caching import FEED_COUNT_TIMEOUT
+
+CURSOR_SEPARATOR = '|'
+# Ключи в базе — 64-битные целые: больший id из курсора SQLite
+# не примет и ответит OverflowError.
+MAX_CURSOR_PK = 2 ** 63 - 1
+
+
+def encode_cursor(instance, field='pub_date'):
+    """Функция кодирует позицию записи в непрозрачный курсор.
+    Ключом может быть дата или число, например ранг в поиске."""
+    value = getattr(instance, field)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = f'{value}{CURSOR_SEPARATOR}{instance.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, parse_value=datetime.fromisoformat):
+    """Функция возвращает пару (ключ, id) из курсора
+    или None, если курсор повреждён."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.rsplit(CURSOR_SEPARATOR, 1)
+        value, pk = parse_value(value), int(pk)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+    if not 0 <= pk <= MAX_CURSOR_PK:
+        return None
+    return value, pk
+
+
+class KeysetPage(Sequence):
+    """Страница без номера и общего количества записей."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, has_next, has_previous,
+                 field='pub_date'):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.field = field
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return ''
+        return encode_cursor(self.object_list[-1], self.field)
+
+    @property
+    def previous_cursor(self):
+        # Пустая страница бывает после устаревшего курсора: от неё
+        # назад ведёт только ссылка на первую страницу.
+        if not self._has_previous or not self.object_list:
+            return ''
+        return encode_cursor(self.object_list[0], self.field)
+
+
+class KeysetPaginator:
+    """Пагинатор, который ищет страницу по ключу (field, id)
+    вместо COUNT(*) и OFFSET.
+
+    По умолчанию записи идут от новых к старым по pub_date, как в ленте;
+    при descending=False — от старых к новым, как комментарии."""
+
+    def __init__(self, queryset, per_page, field='pub_date',
+                 descending=True):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.descending = descending
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после курсора after, перед курсором before
+        или первую страницу, если курсоры не переданы или некорректны."""
+        after_key = decode_cursor(after) if after else None
+        if after_key is not None:
+            return self._get_next_page(*after_key)
+        before_key = decode_cursor(before) if before else None
+        if before_key is not None:
+            page = self._get_previous_page(*before_key)
+            if page:
+                return page
+        return self._get_next_page()
+
+    def _filter_beyond(self, queryset, value, pk, forward):
+        lookup = 'lt' if forward == self.descending else 'gt'
+        return queryset.filter(
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'pk__{lookup}': pk})
+        )
+
+    def _get_ordering(self, forward):
+        prefix = '-' if forward == self.descending else ''
+        return f'{prefix}{self.field}', f'{prefix}pk'
+
+    def _get_next_page(self, value=None, pk=None):
+        queryset = self.queryset.order_by(*self._get_ordering(True))
+        if value is not None:
+            queryset = self._filter_beyond(queryset, value, pk, True)
+        objects = list(queryset[:self.per_page + 1])
+        return KeysetPage(
+            objects[:self.per_page],
+            has_next=len(objects) > self.per_page,
+            has_previous=value is not None,
+            field=self.field
+        )
+
+    def _get_previous_page(self, value, pk):
+        queryset = self._filter_beyond(
+            self.queryset.order_by(*self._get_ordering(False)),
+            value,
+            pk,
+            False
+        )
+        objects = list(queryset[:self.per_page + 1])
+        return KeysetPage(
+            objects[:self.per_page][::-1],
+            has_next=True,
+            has_previous=len(objects) > self.per_page,
+            field=self.field
+        )
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор по номерам страниц, который берёт общее количество
+    постов из кэша вместо COUNT(*) на каждый запрос."""
+
+    def __init__(self, object_list, per_page, count_key, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        return cache.get_or_set(
+            self.count_key,
+            lambda: Paginator.count.func(self),
+            FEED_COUNT_TIMEOUT
+        )
@@ -0,0 +1,188 @@
+"""Уменьшение изображений публикаций по запросу с дисковым кэшем."""
+import fcntl
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+# Допустимые ширины и форматы: произвольные размеры позволили бы
+# заполнить кэш и загрузить сервер пересчётом изображений.
+RESIZE_WIDTHS = (320, 480, 640, 960, 1280, 1920)
+RESIZE_FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True}),
+}
+DEFAULT_CACHE_MAX_SIZE = 256 * 1024 * 1024
+# После переполнения кэш очищается с запасом, чтобы не пересчитывать
+# его размер при каждой записи.
+CACHE_LOW_WATERMARK = 0.9
+# Общий размер кэша хранится в файле и меняется при каждой записи,
+# каталог кэша обходится только при переполнении.
+CACHE_SIZE_FILE = 'size'
+EVICTION_LOCK_FILE = 'evict.lock'
+# Блокировки вариантов распределены по постоянному набору файлов
+# по первым символам ключа и никогда не удаляются: иначе процесс,
+# ждущий удалённый файл блокировки, разминулся бы с новым.
+LOCK_DIR = 'locks'
+LOCK_KEY_LENGTH = 4
+
+
+def get_cache_dir():
+    return Path(getattr(
+        settings,
+        'BLOG_IMAGE_CACHE_DIR',
+        Path(settings.MEDIA_ROOT) / 'resized'
+    ))
+
+
+def get_cache_path(image_name, width, image_format):
+    """Функция возвращает путь к файлу варианта в кэше."""
+    key = hashlib.sha256(
+        f'{image_name}|{width}|{image_format}'.encode()
+    ).hexdigest()
+    return get_cache_dir() / key[:2] / f'{key}.{image_format}'
+
+
+def get_lock_path(path):
+    """Функция возвращает файл блокировки, общий для варианта path
+    и вариантов с тем же началом ключа."""
+    return get_cache_dir() / LOCK_DIR / f'{path.stem[:LOCK_KEY_LENGTH]}.lock'
+
+
+def resize_image(image_file, width, image_format):
+    """Функция уменьшает изображение до заданной ширины и возвращает
+    его байты в нужном формате. Узкое изображение не растягивается."""
+    pil_format, _, options = RESIZE_FORMATS[image_format]
+    with image_file.open('rb'):
+        image = Image.open(image_file)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    if image.width > width:
+        height = max(round(image.height * width / image.width), 1)
+        image = image.resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def get_resized_image(image_file, width, image_format):
+    """Функция возвращает путь к варианту изображения в кэше
+    и готовит его, если варианта ещё нет.
+
+    Параллельные запросы одного варианта ждут блокировку его файла,
+    поэтому изображение уменьшается один раз. Готовый файл появляется
+    в кэше целиком благодаря записи во временный файл и os.replace."""
+    path = get_cache_path(image_file.name, width, image_format)
+    if path.exists():
+        touch(path)
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = get_lock_path(path)
+    lock_path.parent.mkdir(exist_ok=True)
+    with open(lock_path, 'ab') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if path.exists():
+                return path
+            content = resize_image(image_file, width, image_format)
+            descriptor, temp_name = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(descriptor, 'wb') as temp_file:
+                temp_file.write(content)
+            os.replace(temp_name, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+    if update_cache_size(len(content)) > get_cache_max_size():
+        evict_cache(keep=path)
+    return path
+
+
+def touch(path):
+    """Функция обновляет время изменения файла: по нему кэш определяет
+    давно не запрошенные варианты. Время доступа ненадёжно из-за
+    монтирования с noatime."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_cache_max_size():
+    return getattr(
+        settings,
+        'BLOG_IMAGE_CACHE_MAX_SIZE',
+        DEFAULT_CACHE_MAX_SIZE
+    )
+
+
+def get_cache_entries():
+    """Функция возвращает время изменения, размер и путь каждой копии
+    в кэше, пропуская недописанные временные файлы."""
+    entries = []
+    for path in get_cache_dir().glob('??/*'):
+        if path.name.startswith('tmp'):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def update_cache_size(delta=0, total=None):
+    """Функция прибавляет delta к общему размеру кэша или заменяет его
+    на total и возвращает новый размер. Размер хранится в файле
+    под блокировкой flock и общий для всех процессов сервера;
+    без файла он один раз считается обходом каталога."""
+    cache_dir = get_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    descriptor = os.open(cache_dir / CACHE_SIZE_FILE, os.O_RDWR | os.O_CREAT)
+    with os.fdopen(descriptor, 'r+b') as size_file:
+        fcntl.flock(size_file, fcntl.LOCK_EX)
+        if total is None:
+            stored = size_file.read()
+            if stored:
+                total = int(stored) + delta
+            else:
+                total = sum(size for _, size, _ in get_cache_entries())
+        size_file.seek(0)
+        size_file.truncate()
+        size_file.write(str(total).encode())
+    return total
+
+
+def evict_cache(keep=None):
+    """Функция удаляет давно не запрошенные варианты, если общий
+    размер кэша превысил BLOG_IMAGE_CACHE_MAX_SIZE. Файл keep
+    только что подготовлен для ответа и не удаляется.
+
+    Очищает кэш один процесс за раз, остальные в это время
+    не ждут и не обходят каталог повторно."""
+    max_size = get_cache_max_size()
+    with open(get_cache_dir() / EVICTION_LOCK_FILE, 'ab') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+        try:
+            entries = get_cache_entries()
+            total_size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_size <= max_size * CACHE_LOW_WATERMARK:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total_size -= size
+            update_cache_size(total=total_size)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
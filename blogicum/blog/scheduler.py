@@ -0,0 +1,43 @@
+"""Выпуск отложенных публикаций, у которых наступила дата публикации."""
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import Post
+from blog.signals import posts_released
+
+
+def release_due_posts(now=None):
+    """Функция помечает вышедшими посты с наступившей датой публикации,
+    отправляет сигнал posts_released и возвращает их количество."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        due_posts = list(
+            Post.objects.select_for_update().filter(
+                is_released=False,
+                pub_date__lte=now
+            ).values('pk', 'author_id', 'category_id')
+        )
+        if not due_posts:
+            return 0
+        due_pks = [post['pk'] for post in due_posts]
+        # update() не трогает auto_now, а по updated_at строится
+        # Last-Modified лент и страниц постов.
+        released_at = timezone.now()
+        Post.objects.filter(pk__in=due_pks).update(
+            is_released=True,
+            updated_at=released_at
+        )
+        Post.objects.filter(
+            pk__in=due_pks,
+            is_published=True,
+            category__is_published=True
+        ).update(is_visible=True)
+    posts_released.send(sender=Post, posts=due_posts)
+    return len(due_posts)
+
+
+def get_next_release_date():
+    """Функция возвращает дату ближайшей отложенной публикации."""
+    return Post.objects.filter(is_released=False).order_by(
+        'pub_date'
+    ).values_list('pub_date', flat=True).first()
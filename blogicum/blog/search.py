@@ -0,0 +1,116 @@
+"""Полнотекстовый поиск по публикациям.
+
+В SQLite поиск идёт по виртуальной таблице FTS5 blog_post_search
+с заголовком и текстом постов: её создаёт миграция 0022_post_search,
+в актуальном состоянии держат триггеры на blog_post, а перестраивает
+команда rebuild_search_index. Результаты упорядочены по bm25,
+совпадение в заголовке весит больше совпадения в тексте.
+
+В PostgreSQL поиск использует GIN-индекс из миграции
+0021_postgres_indexes и ранжирует результаты по ts_rank."""
+import re
+
+from django.db import connections, router
+
+from blog.models import Post
+
+SEARCH_TABLE = 'blog_post_search'
+# Должна совпадать с конфигурацией индекса post_visible_search_gin_idx.
+SEARCH_CONFIG = 'russian'
+TITLE_WEIGHT = 10.0
+TEXT_WEIGHT = 1.0
+MAX_QUERY_TERMS = 10
+TERM_PATTERN = re.compile(r'\w+')
+
+# Меньший ранг — лучшее совпадение. Позиция (ранг, id) задаёт порядок
+# для постраничного вывода по ключу.
+SQLITE_SEARCH_SQL = f'''
+    SELECT id, rank FROM (
+        SELECT blog_post.id AS id,
+               bm25({SEARCH_TABLE}, %s, %s) AS rank
+        FROM {SEARCH_TABLE}
+        JOIN blog_post ON blog_post.id = {SEARCH_TABLE}.rowid
+        WHERE {SEARCH_TABLE} MATCH %s AND blog_post.is_visible
+    )
+    WHERE rank > %s OR (rank = %s AND id > %s)
+    ORDER BY rank, id
+    LIMIT %s
+'''
+POSTGRES_SEARCH_SQL = f'''
+    SELECT id, rank FROM (
+        SELECT id,
+               -ts_rank(
+                   to_tsvector('{SEARCH_CONFIG}', title || ' ' || text),
+                   query
+               )::float8 AS rank
+        FROM blog_post, plainto_tsquery('{SEARCH_CONFIG}', %s) AS query
+        WHERE to_tsvector('{SEARCH_CONFIG}', title || ' ' || text) @@ query
+          AND is_visible
+    ) AS found
+    WHERE rank > %s OR (rank = %s AND id > %s)
+    ORDER BY rank, id
+    LIMIT %s
+'''
+
+
+def get_query_terms(query):
+    """Функция выделяет из поискового запроса слова без учёта регистра."""
+    return TERM_PATTERN.findall(query.lower())[:MAX_QUERY_TERMS]
+
+
+def get_match_expression(terms):
+    """Функция собирает запрос MATCH для FTS5. Каждое слово берётся
+    в кавычки, чтобы ввод пользователя не разбирался как синтаксис
+    FTS5 (AND, NEAR, *, скобки); слова должны встретиться все."""
+    return ' '.join(f'"{term}"' for term in terms)
+
+
+def find_posts(query, after=None, limit=10):
+    """Функция возвращает до limit пар (id, ранг) видимых постов,
+    подходящих под запрос, начиная после позиции after = (ранг, id)."""
+    terms = get_query_terms(query)
+    if not terms:
+        return []
+    rank, pk = after if after is not None else (float('-inf'), 0)
+    connection = connections[router.db_for_read(Post)]
+    if connection.vendor == 'postgresql':
+        sql = POSTGRES_SEARCH_SQL
+        params = [' '.join(terms), rank, rank, pk, limit]
+    else:
+        sql = SQLITE_SEARCH_SQL
+        params = [
+            TITLE_WEIGHT,
+            TEXT_WEIGHT,
+            get_match_expression(terms),
+            rank,
+            rank,
+            pk,
+            limit
+        ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def reindex_batch(cursor, first_id, last_id):
+    """Функция заново индексирует посты с id в (first_id, last_id]:
+    старые записи индекса удаляются, текущие добавляются."""
+    cursor.execute(
+        f'DELETE FROM {SEARCH_TABLE} WHERE rowid > %s AND rowid <= %s',
+        [first_id, last_id]
+    )
+    cursor.execute(
+        f'INSERT INTO {SEARCH_TABLE} (rowid, title, text) '
+        'SELECT id, title, text FROM blog_post '
+        'WHERE id > %s AND id <= %s',
+        [first_id, last_id]
+    )
+
+
+def delete_orphans(cursor):
+    """Функция удаляет из индекса записи удалённых постов."""
+    cursor.execute(
+        f'DELETE FROM {SEARCH_TABLE} '
+        'WHERE rowid NOT IN (SELECT id FROM blog_post)'
+    )
+    return cursor.rowcount
@@ -0,0 +1,309 @@
+"""Обработчики сигналов приложения blog."""
+from asgiref.local import Local
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from blog.caching import (
+    invalidate_all_feed_counts,
+    invalidate_post_feed_counts,
+    invalidate_tags
+)
+from blog.images import release_image_files, save_rendition_names
+from blog.jobs import enqueue_image_job
+from blog.models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+# Отправляется планировщиком после выпуска отложенных публикаций,
+# posts — список словарей с ключами pk, author_id и category_id.
+posts_released = Signal()
+
+# Посты и пользователи, удаление которых сейчас идёт: их комментарии
+# удаляются каскадом, и счётчики по одному комментарию не нужны.
+_deleting = Local()
+
+
+def get_deleting_ids(name):
+    """Функция возвращает множество id удаляемых объектов в потоке."""
+    if not hasattr(_deleting, name):
+        setattr(_deleting, name, set())
+    return getattr(_deleting, name)
+
+
+def is_cascaded(comment):
+    """Функция проверяет, удаляется ли комментарий вместе с постом
+    или автором: тогда счётчик и кэш уже обработаны для всех сразу."""
+    return (comment.post_id in get_deleting_ids('post_ids')
+            or comment.author_id in get_deleting_ids('author_ids'))
+
+
+@receiver(post_save, sender=Comment)
+def increase_comment_count(sender, instance, created, **kwargs):
+    """Увеличивает счётчик комментариев поста при создании комментария.
+    updated_at поста тоже обновляется: счётчик виден в карточке поста."""
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def decrease_comment_count(sender, instance, **kwargs):
+    """Уменьшает счётчик комментариев поста при удалении комментария.
+    При каскадном удалении поста счётчик не нужен, а при удалении
+    пользователя он уменьшается сразу на все его комментарии."""
+    if is_cascaded(instance):
+        return
+    Post.objects.filter(
+        pk=instance.post_id,
+        comment_count__gt=0
+    ).update(
+        comment_count=F('comment_count') - 1,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleting_post(sender, instance, **kwargs):
+    """Отмечает удаляемый пост до каскадного удаления комментариев."""
+    get_deleting_ids('post_ids').add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance, **kwargs):
+    """Снимает отметку с удалённого поста."""
+    get_deleting_ids('post_ids').discard(instance.pk)
+
+
+@receiver(pre_delete, sender=User)
+def decrease_comment_counts_of_user(sender, instance, **kwargs):
+    """Одним UPDATE на пост уменьшает счётчики комментариев удаляемого
+    пользователя. Его собственные посты удаляются целиком, их
+    счётчики не трогаются. Страницы с комментариями пользователя
+    сбрасывает тег user:<id>, а здесь — карточки постов со счётчиком."""
+    counts = Comment.objects.filter(author=instance).exclude(
+        post__author=instance
+    ).order_by().values('post_id').annotate(removed=Count('pk'))
+    now = timezone.now()
+    post_ids = []
+    for row in counts:
+        Post.objects.filter(pk=row['post_id']).update(
+            comment_count=Greatest(F('comment_count') - row['removed'], 0),
+            updated_at=now
+        )
+        post_ids.append(row['post_id'])
+    if post_ids:
+        invalidate_tags(*(f'post:{post_id}' for post_id in post_ids))
+    get_deleting_ids('author_ids').add(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    """Снимает отметку с удалённого пользователя."""
+    get_deleting_ids('author_ids').discard(instance.pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_state(sender, instance, **kwargs):
+    """Запоминает прежние категорию и изображение поста: после смены
+    категории сбрасывается счётчик и её ленты, а после смены
+    изображения удаляются его старые варианты."""
+    previous = None
+    if instance.pk is not None:
+        previous = Post.objects.filter(pk=instance.pk).values(
+            'category_id',
+            'image',
+            'image_renditions'
+        ).first()
+    instance._previous_category_id = previous and previous['category_id']
+    instance._stale_image_name = ''
+    instance._stale_image_renditions = []
+    instance._image_changed = bool(instance.image) and previous is None
+    if previous and previous['image'] != instance.image.name:
+        instance._stale_image_name = previous['image']
+        instance._stale_image_renditions = previous['image_renditions']
+        instance._image_changed = bool(instance.image)
+        instance.image_renditions = []
+
+
+@receiver(post_save, sender=Post)
+def process_post_image(sender, instance, **kwargs):
+    """Ставит новое изображение поста в очередь фоновой обработки
+    и освобождает прежнее вместе с вариантами. Пока задание
+    не выполнено, в шаблонах выводится исходник."""
+    if getattr(instance, '_stale_image_name', ''):
+        save_rendition_names(instance.pk, instance.image_renditions)
+    release_image_files(
+        instance.image.storage,
+        getattr(instance, '_stale_image_name', ''),
+        getattr(instance, '_stale_image_renditions', [])
+    )
+    if getattr(instance, '_image_changed', False):
+        enqueue_image_job(instance)
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_image_renditions(sender, instance, **kwargs):
+    """Освобождает изображение удалённого поста и его варианты."""
+    release_image_files(
+        instance.image.storage,
+        instance.image.name,
+        instance.image_renditions
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_post_feed_counts(sender, instance, **kwargs):
+    """Сбрасывает кэшированные счётчики лент, в которые попадает пост."""
+    previous_category_id = getattr(instance, '_previous_category_id', None)
+    invalidate_post_feed_counts(
+        instance.author_id,
+        {instance.category_id, previous_category_id}
+    )
+
+
+@receiver(pre_save, sender=Category)
+def remember_previous_publication(sender, instance, **kwargs):
+    """Запоминает прежнее значение is_published у категории."""
+    instance._previous_is_published = None
+    if instance.pk is not None:
+        instance._previous_is_published = Category.objects.filter(
+            pk=instance.pk
+        ).values_list('is_published', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+def update_visibility_on_publication(sender, instance, created, **kwargs):
+    """Одним UPDATE пересчитывает видимость постов категории и сбрасывает
+    счётчики всех лент при публикации или снятии категории с публикации."""
+    if created or instance._previous_is_published == instance.is_published:
+        return
+    if instance.is_published:
+        Post.objects.filter(
+            category=instance,
+            is_published=True,
+            is_released=True
+        ).update(is_visible=True)
+    else:
+        Post.objects.filter(category=instance).update(is_visible=False)
+    invalidate_all_feed_counts()
+
+
+@receiver(pre_delete, sender=Category)
+def hide_posts_of_deleted_category(sender, instance, **kwargs):
+    """Скрывает посты удаляемой категории: у них обнулится категория."""
+    Post.objects.filter(category=instance).update(is_visible=False)
+
+
+@receiver(post_delete, sender=Category)
+def reset_feed_counts_on_category_delete(sender, instance, **kwargs):
+    """Сбрасывает счётчики всех лент: посты удалённой категории
+    остаются без категории и пропадают из лент."""
+    invalidate_all_feed_counts()
+
+
+@receiver(posts_released)
+def reset_feed_counts_on_release(sender, posts, **kwargs):
+    """Сбрасывает счётчики лент, в которые попали вышедшие посты."""
+    for post in posts:
+        invalidate_post_feed_counts(post['author_id'], {post['category_id']})
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_post_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц с постом и лент, в которые он входит."""
+    category_ids = {
+        instance.category_id,
+        getattr(instance, '_previous_category_id', None)
+    }
+    invalidate_tags(
+        f'post:{instance.pk}',
+        f'post-comments:{instance.pk}',
+        'feed:index',
+        f'feed:author:{instance.author_id}',
+        *(f'feed:category:{category_id}'
+          for category_id in category_ids if category_id is not None)
+    )
+
+
+@receiver(posts_released)
+def reset_pages_on_release(sender, posts, **kwargs):
+    """Сбрасывает кэш лент, в которые попали вышедшие посты."""
+    tags = {'feed:index'}
+    for post in posts:
+        tags.add(f'feed:author:{post["author_id"]}')
+        tags.add(f'feed:category:{post["category_id"]}')
+    invalidate_tags(*tags)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def reset_comment_pages(sender, instance, created=False, **kwargs):
+    """Сбрасывает кэш страниц, где виден пост комментария:
+    меняются список комментариев и их количество в карточке.
+    Из страниц комментариев сбрасывается та, где он выводится,
+    а новый комментарий попадает на последнюю. При каскадном
+    удалении страницы сбрасываются один раз для поста или автора."""
+    if not created and is_cascaded(instance):
+        return
+    tags = [f'post:{instance.post_id}', f'comment:{instance.pk}']
+    if created:
+        tags.append(f'comments:{instance.post_id}:tail')
+    invalidate_tags(*tags)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_category_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц с постами категории и общей ленты,
+    состав которой зависит от публикации категории."""
+    invalidate_tags(
+        f'category:{instance.pk}',
+        f'feed:category:{instance.pk}',
+        'feed:index'
+    )
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def reset_location_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц с постами из этого местоположения."""
+    invalidate_tags(f'location:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_user_pages(sender, instance, created=False, update_fields=None,
+                     **kwargs):
+    """Сбрасывает кэш профиля пользователя и страниц с его постами
+    и комментариями. Обновление только last_login при входе
+    не меняет страниц и кэш не сбрасывает.
+
+    Ленты, где есть его посты, тоже сбрасываются: их ETag строится
+    по тегам ленты, а не по авторам каждой карточки. У нового
+    пользователя постов ещё нет."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    tags = [f'user:{instance.pk}']
+    if not created:
+        category_ids = Post.objects.filter(
+            author_id=instance.pk
+        ).order_by().values_list('category_id', flat=True).distinct()
+        tags += ['feed:index', f'feed:author:{instance.pk}']
+        tags += [
+            f'feed:category:{category_id}'
+            for category_id in category_ids if category_id is not None
+        ]
+    invalidate_tags(*tags)
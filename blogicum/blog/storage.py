@@ -0,0 +1,69 @@
+"""Хранилище изображений публикаций с адресацией по содержимому."""
+import hashlib
+import os
+import posixpath
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_SIZE = 64 * 1024
+EXTENSION_PATTERN = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище, в котором имя файла — SHA-256 его содержимого.
+
+    Одинаковые загрузки получают одно имя и хранятся один раз:
+    повторная запись не выполняется, а Django не подбирает
+    свободное имя с суффиксом. Файл принадлежит всем постам,
+    которые на него ссылаются, поэтому удалять его можно только
+    после проверки ссылок (см. blog.images.release_image_files)."""
+
+    def get_content_name(self, name, content):
+        """Возвращает имя файла по содержимому: каталог из upload_to,
+        два первых символа хеша как подкаталог и расширение исходника."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        if not EXTENSION_PATTERN.match(extension):
+            extension = ''
+        return posixpath.join(
+            directory, digest[:2], f'{digest}{extension}'
+        )
+
+    def get_available_name(self, name, max_length=None):
+        """Имя по содержимому не меняется: занятое имя означает,
+        что такой файл уже записан."""
+        if self.exists(name):
+            raise FileExistsError(name)
+        return name
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.get_content_name(name, content)
+        if self.exists(name):
+            # Свежее время изменения защищает файл от сборки мусора,
+            # пока пост с новой ссылкой на него ещё не сохранён.
+            os.utime(self.path(name))
+            return name
+        try:
+            return self._save(name, content)
+        except FileExistsError:
+            # Такой же файл успел записать параллельный запрос.
+            return name
+
+
+post_image_storage = ContentAddressedStorage()
+
+
+def get_post_image_storage():
+    """Возвращает хранилище изображений публикаций. Функция нужна,
+    чтобы миграции ссылались на неё, а не на настройки хранилища."""
+    return post_image_storage
@@ -0,0 +1,53 @@
+"""Потоковая отрисовка страниц с длинными списками."""
+from uuid import uuid4
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+STREAM_CHUNK_SIZE = 100
+
+
+def is_streaming_enabled():
+    return getattr(settings, 'BLOG_STREAMING_RENDER', False)
+
+
+def render_streaming(request, template_name, context, items_name,
+                     items, list_template, chunk_size=STREAM_CHUNK_SIZE):
+    """Функция отдаёт страницу через StreamingHttpResponse.
+
+    Страница рисуется сразу, но вместо списка items_name в неё
+    подставляется метка stream_marker. Всё до метки, то есть <head>
+    со стилями и начало страницы, уходит клиенту первым. Затем список
+    рисуется шаблоном list_template порциями по chunk_size элементов,
+    поэтому память на запрос не зависит от длины списка, если items —
+    итератор, например queryset.iterator()."""
+    marker = mark_safe(f'<!-- stream:{uuid4().hex} -->')
+    page = render_to_string(
+        template_name,
+        {**context, 'stream_marker': marker},
+        request
+    )
+    head, tail = page.split(marker, 1)
+
+    def stream():
+        yield head
+        chunk = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == chunk_size:
+                yield render_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield render_chunk(chunk)
+        yield tail
+
+    def render_chunk(chunk):
+        return render_to_string(
+            list_template,
+            {**context, items_name: chunk},
+            request
+        )
+
+    return StreamingHttpResponse(stream())
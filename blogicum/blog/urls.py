@@ -10,6 +10,17 @@ urlpatterns = [
     path('posts/<int:post_id>/edit/', views.edit_post, name='edit_post'),
     path('posts/<int:post_id>/delete/', views.delete_post, name='delete_post'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/image/<str:image_key>/'
+        '<int:width>.<str:image_format>',
+        views.post_image,
+        name='post_image'
+    ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path('posts/<int:post_id>/comment', views.add_comment, name='add_comment'),
     path(
         'posts/<int:post_id>/edit_comment/<int:comment_id>/',
@@ -29,5 +40,6 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     path('category/<slug:category_slug>/',
          views.category_posts, name='category_posts'),
+    path('search/', views.search, name='search'),
     path('', views.index, name='index'),
 ]
@@ -1,113 +1,438 @@
 """Функции, отвечающие за вывод приложения blog."""
+import posixpath
+from functools import wraps
+
+from django.conf import settings
 from django.http import Http404
-from django.utils import timezone
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count
 from django.core.paginator import Paginator
+from django.db.models import OuterRef, Subquery
+from django.utils.cache import patch_cache_control
 
 from blog.models import Post, Category, Comment
+from blog.caching import (
+    FEED_AUTHOR_OWNER,
+    FEED_AUTHOR_PUBLIC,
+    FEED_CATEGORY,
+    FEED_INDEX,
+    add_page_cache_tags,
+    cache_anonymous_page,
+    get_comment_page_tags,
+    get_feed_count_key,
+    get_post_tags,
+    get_posts_tags,
+    get_tag_versions,
+    set_post_card_versions
+)
+from blog.conditional import (
+    conditional_page,
+    get_feed_state,
+    get_tags_last_modified
+)
+from blog.paginators import (
+    CachedCountPaginator,
+    KeysetPage,
+    KeysetPaginator,
+    decode_cursor
+)
 from blog.forms import UserEditProfileForm, PostForm, CommentForm
+from blog.images import IMAGE_ERRORS, store_uploaded_image
+from blog.media import send_media_file
+from blog.resize import RESIZE_FORMATS, RESIZE_WIDTHS, get_resized_image
+from blog.search import find_posts
+from blog.storage import get_post_image_storage
+from blog.writes import serialized_write, unavailable_on_busy_write
+from blog.streaming import (
+    is_streaming_enabled,
+    render_streaming
+)
 
 POSTS_PAGE_LIMIT = 10
+COMMENTS_PAGE_LIMIT = 50
+FRAGMENT_CONTENT_TYPE = 'text/html-fragment'
+IMAGE_CACHE_MAX_AGE = 365 * 24 * 60 * 60
 POSTS_ALL = Post.objects.select_related(
     'author',
     'category',
     'location'
 )
-COMMENTS_ALL = Comment.objects.select_related('post')
-POSTS_PUBLISHED = POSTS_ALL.filter(
-    is_published=True,
-    category__is_published=True
-)
+COMMENTS_ALL = Comment.objects.select_related('author')
+POSTS_PUBLISHED = POSTS_ALL.filter(is_visible=True)
 
 
 def check_author(view_func):
     """Функция-декоратор для проверки, является ли
-    текущий пользователь автором поста или комментария."""
+    текущий пользователь автором поста или комментария.
+
+    Пост или комментарий загружается одним запросом, автор сравнивается
+    по author_id, а найденный объект передаётся во view как instance."""
+    @wraps(view_func)
     def wrapper(request, *args, **kwargs):
         post_id = kwargs.get('post_id')
         if not request.user.is_authenticated:
             return redirect('blog:post_detail', post_id)
 
         comment_id = kwargs.get('comment_id')
-        post_object = get_object_or_404(Post, pk=post_id)
         if comment_id is not None:
-            comment_object = get_object_or_404(
-                COMMENTS_ALL,
+            instance = get_object_or_404(
+                Comment,
                 id=comment_id,
-                post__id=post_id
+                post_id=post_id
             )
-            if (comment_object.author != request.user):
-                return redirect('blog:post_detail', post_id)
-        elif (post_object.author != request.user):
+        else:
+            instance = get_object_or_404(Post, pk=post_id)
+        if instance.author_id != request.user.id:
             return redirect('blog:post_detail', post_id)
 
-        return view_func(request, *args, **kwargs)
+        return view_func(request, *args, instance=instance, **kwargs)
     return wrapper
 
 
-def init_paginator(request, queryset):
+def is_fragment_request(request):
+    """Функция проверяет, что клиент ждёт в ответ фрагмент разметки,
+    а не перенаправление на страницу: запросы htmx передают заголовок
+    HX-Request, остальные клиенты могут запросить text/html-fragment."""
+    return (
+        request.headers.get('HX-Request') == 'true'
+        or FRAGMENT_CONTENT_TYPE in request.headers.get('Accept', '')
+    )
+
+
+def render_comment(request, comment):
+    """Функция отвечает разметкой одного комментария вместо
+    перенаправления на страницу поста."""
+    template = 'includes/comment.html'
+    context = {
+        'comment': comment
+    }
+    return render(request, template, context)
+
+
+def render_comment_form(request, form, post=None):
+    """Функция отвечает формой комментария с ошибками: формой
+    редактирования, если комментарий уже сохранён, иначе формой
+    добавления комментария к посту post."""
+    template = 'includes/comment_form.html'
+    context = {
+        'form': form,
+        'comment': form.instance,
+        'post': post
+    }
+    return render(request, template, context, status=400)
+
+
+def render_feed(request, template, context):
+    """Функция отрисовывает ленту. В потоковом режиме карточки постов
+    отдаются после <head> и начала страницы."""
+    if is_streaming_enabled():
+        return render_streaming(
+            request,
+            template,
+            context,
+            'page_obj',
+            context['page_obj'],
+            'includes/post_list.html'
+        )
+    return render(request, template, context)
+
+
+def init_paginator(request, queryset, count_key=None):
     """Функция инициализирует пагинатор
-    и возвращает посты текущей страницы."""
-    paginator = Paginator(queryset, POSTS_PAGE_LIMIT)
+    и возвращает посты текущей страницы.
+
+    Если передан count_key, общее количество постов берётся из кэша.
+
+    В режиме keyset, а также при наличии курсора ?after= или ?before=,
+    страница выбирается по ключу (pub_date, id) без COUNT и OFFSET."""
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    if (after or before
+       or getattr(settings, 'BLOG_FEED_PAGINATION', 'page') == 'keyset'):
+        paginator = KeysetPaginator(queryset, POSTS_PAGE_LIMIT)
+        return paginator.get_page(after=after, before=before)
+
+    if count_key is not None:
+        paginator = CachedCountPaginator(queryset, POSTS_PAGE_LIMIT, count_key)
+    else:
+        paginator = Paginator(queryset, POSTS_PAGE_LIMIT)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
-def get_posts_with_current_time():
-    """Функция возвращает публикации,
-    учитывая фильтр по текущему времени и дате публикации."""
-    return POSTS_PUBLISHED.filter(
-        pub_date__lte=timezone.now()
-    ).annotate(comment_count=Count('comments')).order_by('-pub_date')
+def get_comments_page(post, after=None):
+    """Функция возвращает страницу комментариев поста от старых
+    к новым: первую или следующую после курсора after."""
+    paginator = KeysetPaginator(
+        COMMENTS_ALL.filter(post=post),
+        COMMENTS_PAGE_LIMIT,
+        field='created_at',
+        descending=False
+    )
+    return paginator.get_page(after=after)
+
+
+def get_search_page(query, after=None):
+    """Функция возвращает страницу видимых постов, найденных по запросу,
+    от лучших совпадений к худшим: первую или следующую после курсора
+    after с позицией (ранг, id)."""
+    after_key = decode_cursor(after, float) if after else None
+    found = find_posts(query, after_key, POSTS_PAGE_LIMIT + 1)
+    ranks = dict(found[:POSTS_PAGE_LIMIT])
+    posts = POSTS_PUBLISHED.in_bulk(ranks)
+    objects = []
+    for pk, rank in ranks.items():
+        if pk in posts:
+            posts[pk].search_rank = rank
+            objects.append(posts[pk])
+    return KeysetPage(
+        objects,
+        has_next=len(found) > POSTS_PAGE_LIMIT,
+        has_previous=after_key is not None,
+        field='search_rank'
+    )
+
 
+def get_visible_posts():
+    """Функция возвращает посты, видимые читателям: опубликованные,
+    из опубликованной категории и с наступившей датой публикации."""
+    return POSTS_PUBLISHED.order_by('-pub_date')
+
+
+def get_profile_posts(profile, user):
+    """Функция возвращает публикации автора. Чужие читатели
+    видят только посты, видимые всем."""
+    posts_queryset = POSTS_ALL.filter(author=profile)
+    if user != profile:
+        posts_queryset = posts_queryset.filter(is_visible=True)
+    return posts_queryset.order_by('-pub_date')
+
+
+def get_index_state(request):
+    """Функция возвращает состояние главной страницы для ETag."""
+    return get_feed_state(get_visible_posts(), 'feed:index')
+
+
+def get_post_detail_state(request, post_id):
+    """Функция возвращает состояние страницы поста для ETag:
+    время изменения поста, его комментариев, категории и места."""
+    last_comment = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by('-updated_at').values('updated_at')[:1]
+    post = Post.objects.filter(pk=post_id).annotate(
+        comments_updated_at=Subquery(last_comment)
+    ).values(
+        'author_id',
+        'is_visible',
+        'updated_at',
+        'comments_updated_at',
+        'category__updated_at',
+        'location__updated_at'
+    ).first()
+    if post is None or (not post['is_visible']
+                        and post['author_id'] != request.user.pk):
+        return None
+    tags = (f'post:{post_id}', f'user:{post["author_id"]}')
+    versions = get_tag_versions(tags)
+    etag_parts = [versions[tag] for tag in tags]
+    last_modified = max(filter(None, (
+        post['updated_at'],
+        post['comments_updated_at'],
+        post['category__updated_at'],
+        post['location__updated_at'],
+        get_tags_last_modified(etag_parts),
+    )))
+    return last_modified, etag_parts
+
+
+def get_profile_state(request, username):
+    """Функция возвращает состояние страницы пользователя для ETag."""
+    profile = User.objects.filter(is_active=True, username=username).first()
+    if profile is None:
+        return None
+    return get_feed_state(
+        get_profile_posts(profile, request.user),
+        f'feed:author:{profile.id}',
+        f'user:{profile.id}'
+    )
 
+
+def get_category_state(request, category_slug):
+    """Функция возвращает состояние страницы категории для ETag."""
+    category_id = Category.objects.filter(
+        slug=category_slug,
+        is_published=True
+    ).values_list('id', flat=True).first()
+    if category_id is None:
+        return None
+    return get_feed_state(
+        get_visible_posts().filter(category_id=category_id),
+        f'feed:category:{category_id}',
+        f'category:{category_id}'
+    )
+
+
+@cache_anonymous_page
+@conditional_page(get_index_state)
 def index(request):
     """Функция отображения главной страницы с постами."""
     template = 'blog/index.html'
-    posts_queryset = get_posts_with_current_time()
-    page_obj = init_paginator(request, posts_queryset)
+    posts_queryset = get_visible_posts()
+    page_obj = init_paginator(
+        request,
+        posts_queryset,
+        get_feed_count_key(FEED_INDEX)
+    )
+    set_post_card_versions(page_obj)
+    add_page_cache_tags(request, 'feed:index', *get_posts_tags(page_obj))
     context = {
         'page_obj': page_obj
     }
-    return render(request, template, context)
+    return render_feed(request, template, context)
 
 
+@cache_anonymous_page
+@conditional_page(get_post_detail_state)
 def post_detail(request, post_id):
     """Функция отображения поста в блоге под конкретным id."""
 
     post = get_object_or_404(POSTS_ALL, id=post_id)
 
-    if ((request.user != post.author)
-       and (not (post.pub_date <= timezone.now())
-       or not post.is_published or not post.category.is_published)):
+    if request.user != post.author and not post.is_visible:
         raise Http404(f'Пост с id {post_id} не найден!')
 
-    comments = post.comments.all()
-
+    comments = get_comments_page(post)
     template = 'blog/detail.html'
     context = {
         'post': post,
         'comments': comments,
         'form': CommentForm()
     }
+    if is_streaming_enabled():
+        # Потоковая страница не кэшируется и не привязывается к тегам.
+        return render_streaming(
+            request,
+            template,
+            context,
+            'comments',
+            comments,
+            'includes/comment_list.html'
+        )
+
+    add_page_cache_tags(
+        request,
+        *get_post_tags(post),
+        *{f'user:{comment.author_id}' for comment in comments}
+    )
     return render(request, template, context)
 
 
-@check_author
-def delete_comment(request, post_id, comment_id):
-    template = 'blog/comment.html'
+@cache_anonymous_page
+def post_comments(request, post_id):
+    """Функция отдаёт фрагмент со следующей страницей комментариев
+    после курсора ?after=. Страница кэшируется отдельно и сбрасывается
+    при изменении или удалении её комментариев."""
+    post = get_object_or_404(
+        Post.objects.only('author_id', 'category_id', 'is_visible'),
+        pk=post_id
+    )
+    if not post.is_visible and post.author_id != request.user.id:
+        raise Http404(f'Пост с id {post_id} не найден!')
+
+    comments = get_comments_page(post, request.GET.get('after'))
+    add_page_cache_tags(request, *get_comment_page_tags(post, comments))
+    template = 'includes/comment_page.html'
+    context = {
+        'post': post,
+        'comments': comments
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    """Функция отображения результатов поиска по публикациям."""
+    query = request.GET.get('q', '').strip()
+    page_obj = get_search_page(query, request.GET.get('after'))
+    set_post_card_versions(page_obj)
+    template = 'blog/search.html'
+    context = {
+        'query': query,
+        'page_obj': page_obj
+    }
+    return render(request, template, context)
+
 
-    instance = get_object_or_404(
-        COMMENTS_ALL,
-        id=comment_id,
-        post_id=post_id
+def post_image(request, post_id, image_key, width, image_format):
+    """Функция отдаёт копию изображения поста заданной ширины
+    и формата из дискового кэша, готовя её при первом запросе."""
+    if width not in RESIZE_WIDTHS or image_format not in RESIZE_FORMATS:
+        raise Http404
+    post = get_object_or_404(
+        Post.objects.only('author_id', 'image', 'is_visible'),
+        pk=post_id
     )
+    if not post.image or post.image_key != image_key:
+        raise Http404
+    if not post.is_visible and post.author_id != request.user.id:
+        raise Http404
+    try:
+        path = get_resized_image(post.image, width, image_format)
+    except IMAGE_ERRORS:
+        raise Http404
+
+    response = send_media_file(
+        path,
+        content_type=RESIZE_FORMATS[image_format][1]
+    )
+    patch_cache_control(
+        response,
+        public=post.is_visible,
+        private=not post.is_visible,
+        max_age=IMAGE_CACHE_MAX_AGE,
+        immutable=True
+    )
+    return response
+
+
+def serve_media(request, path):
+    """Функция отдаёт изображение поста из MEDIA_ROOT. Изображения
+    скрытых постов видит только автор. Имена файлов совпадают с хешем
+    содержимого, поэтому ответ можно кэшировать бессрочно."""
+    name = posixpath.normpath(path)
+    if name.startswith(('.', '/')):
+        raise Http404
+    owners = Post.objects.filter(image=name)
+    if not owners.exists():
+        owners = Post.objects.filter(rendition_files__name=name)
+    owners = list(owners.values_list('is_visible', 'author_id'))
+    is_public = any(is_visible for is_visible, _ in owners)
+    if not is_public and request.user.id not in {
+        author_id for _, author_id in owners
+    }:
+        raise Http404
+    storage = get_post_image_storage()
+    if not storage.exists(name):
+        raise Http404
+
+    response = send_media_file(storage.path(name))
+    patch_cache_control(
+        response,
+        public=is_public,
+        private=not is_public,
+        max_age=IMAGE_CACHE_MAX_AGE,
+        immutable=True
+    )
+    return response
+
+
+@check_author
+@unavailable_on_busy_write
+def delete_comment(request, post_id, comment_id, instance):
+    template = 'blog/comment.html'
 
     if request.method == 'POST':
-        instance.delete()
+        serialized_write(instance.delete)
         return redirect('blog:post_detail', post_id)
 
     context = {
@@ -118,18 +443,18 @@ def delete_comment(request, post_id, comment_id):
 
 
 @check_author
-def edit_comment(request, post_id, comment_id):
+@unavailable_on_busy_write
+def edit_comment(request, post_id, comment_id, instance):
     template = 'blog/comment.html'
-    instance = get_object_or_404(
-        COMMENTS_ALL,
-        id=comment_id,
-        post_id=post_id
-    )
 
     form = CommentForm(request.POST or None, instance=instance)
     if form.is_valid():
-        form.save()
+        serialized_write(form.save)
+        if is_fragment_request(request):
+            return render_comment(request, instance)
         return redirect('blog:post_detail', post_id)
+    if request.method == 'POST' and is_fragment_request(request):
+        return render_comment_form(request, form)
 
     context = {
         'comment': instance,
@@ -139,6 +464,7 @@ def edit_comment(request, post_id, comment_id):
 
 
 @login_required
+@unavailable_on_busy_write
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST)
@@ -146,16 +472,20 @@ def add_comment(request, post_id):
         new_comment = form.save(commit=False)
         new_comment.author = request.user
         new_comment.post = post
-        new_comment.save()
+        serialized_write(new_comment.save)
+        if is_fragment_request(request):
+            return render_comment(request, new_comment)
+    elif is_fragment_request(request):
+        return render_comment_form(request, form, post)
     return redirect('blog:post_detail', post_id)
 
 
 @check_author
-def delete_post(request, post_id):
+@unavailable_on_busy_write
+def delete_post(request, post_id, instance):
     template = 'blog/create.html'
-    instance = get_object_or_404(Post, pk=post_id)
     if request.method == 'POST':
-        instance.delete()
+        serialized_write(instance.delete)
         return redirect('blog:index')
 
     context = {'instance': instance}
@@ -164,9 +494,9 @@ def delete_post(request, post_id):
 
 
 @check_author
-def edit_post(request, post_id):
+@unavailable_on_busy_write
+def edit_post(request, post_id, instance):
     template = 'blog/create.html'
-    instance = get_object_or_404(Post, id=post_id)
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
@@ -174,13 +504,16 @@ def edit_post(request, post_id):
     )
     context = {'form': form}
     if form.is_valid():
-        form.save()
+        post = form.save(commit=False)
+        store_uploaded_image(post)
+        serialized_write(post.save)
         return redirect('blog:post_detail', post_id)
 
     return render(request, template, context)
 
 
 @login_required
+@unavailable_on_busy_write
 def create_post(request):
     template = 'blog/create.html'
     form = PostForm(
@@ -192,7 +525,8 @@ def create_post(request):
     if form.is_valid():
         new_post = form.save(commit=False)
         new_post.author = request.user
-        new_post.save()
+        store_uploaded_image(new_post)
+        serialized_write(new_post.save)
         return redirect('blog:profile', request.user.username)
 
     return render(request, template, context)
@@ -211,25 +545,35 @@ def edit_profile(request, username):
     return render(request, template, context)
 
 
+@cache_anonymous_page
+@conditional_page(get_profile_state)
 def profile(request, username):
     template = 'blog/profile.html'
     profile = get_object_or_404(User, is_active=True, username=username)
 
-    posts_queryset = POSTS_ALL.filter(author=profile)
-    if request.user != profile:
-        posts_queryset = posts_queryset.filter(category__is_published=True,
-                                               pub_date__lte=timezone.now())
-    posts_queryset = posts_queryset.annotate(
-        comment_count=Count('comments')
-    ).order_by('-pub_date')
-    page_obj = init_paginator(request, posts_queryset)
+    posts_queryset = get_profile_posts(profile, request.user)
+    feed = FEED_AUTHOR_OWNER if request.user == profile else FEED_AUTHOR_PUBLIC
+    page_obj = init_paginator(
+        request,
+        posts_queryset,
+        get_feed_count_key(feed, profile.id)
+    )
+    set_post_card_versions(page_obj)
+    add_page_cache_tags(
+        request,
+        f'feed:author:{profile.id}',
+        f'user:{profile.id}',
+        *get_posts_tags(page_obj)
+    )
     context = {
         'page_obj': page_obj,
         'profile': profile,
     }
-    return render(request, template, context)
+    return render_feed(request, template, context)
 
 
+@cache_anonymous_page
+@conditional_page(get_category_state)
 def category_posts(request, category_slug):
     """Функция отображения постов в категории."""
     template = 'blog/category.html'
@@ -240,12 +584,23 @@ def category_posts(request, category_slug):
         is_published=True
     )
 
-    posts_queryset = get_posts_with_current_time().filter(
+    posts_queryset = get_visible_posts().filter(
         category_id=category.id
     )
-    page_obj = init_paginator(request, posts_queryset)
+    page_obj = init_paginator(
+        request,
+        posts_queryset,
+        get_feed_count_key(FEED_CATEGORY, category.id)
+    )
+    set_post_card_versions(page_obj)
+    add_page_cache_tags(
+        request,
+        f'feed:category:{category.id}',
+        f'category:{category.id}',
+        *get_posts_tags(page_obj)
+    )
     context = {
         'category': category,
         'page_obj': page_obj
     }
-    return render(request, template, context)
+    return render_feed(request, template, context)
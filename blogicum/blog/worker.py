@@ -0,0 +1,17 @@
+"""Точки входа для процессов пула обработчика изображений.
+
+Модуль не импортирует модели при загрузке: процесс, запущенный
+методом spawn, сначала импортирует его и лишь затем настраивает Django."""
+
+
+def init_worker_process():
+    """Настраивает Django в новом процессе пула."""
+    import django
+
+    django.setup()
+
+
+def run_image_job(job_id):
+    from blog.jobs import run_image_job
+
+    return run_image_job(job_id)
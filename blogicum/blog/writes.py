@@ -0,0 +1,256 @@
+"""Очередь записи в SQLite: запись в базу выполняет один процесс за раз.
+
+SQLite допускает одного писателя. Когда несколько процессов сервера
+одновременно начинают запись, проигравшие получают SQLITE_BUSY
+(«database is locked») или долго ждут. Функция serialized_write
+выстраивает запись в базу в очередь через блокировку файла рядом
+с базой, ограничивает её длину местами-файлами, общими для всех
+процессов сервера, и выполняет запись в транзакции
+BEGIN IMMEDIATE: блокировка записи берётся сразу, а не при первом
+INSERT, поэтому транзакция не падает посередине. Если база всё же
+занята другим процессом, например командой управления, запись
+повторяется с экспоненциальной задержкой.
+
+В очереди выполняется только сама запись ORM: разбор формы,
+сохранение загруженных файлов и отрисовка шаблона идут вне
+блокировки. Очередь включается настройкой BLOG_WRITE_COORDINATION
+и действует только для SQLite: PostgreSQL сам принимает
+параллельную запись."""
+import fcntl
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+from django.db import transaction
+from django.http import HttpResponse
+
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_LOCK_TIMEOUT = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.05
+LOCK_POLL_INTERVAL = 0.005
+RETRY_AFTER = 1
+
+WRITE_COUNT_KEY = 'blog:writes:count'
+WRITE_WAIT_KEY = 'blog:writes:wait_us'
+WRITE_RETRIES_KEY = 'blog:writes:retries'
+WRITE_REJECTED_KEY = 'blog:writes:rejected'
+WRITE_STATS_KEYS = (
+    WRITE_COUNT_KEY,
+    WRITE_WAIT_KEY,
+    WRITE_RETRIES_KEY,
+    WRITE_REJECTED_KEY,
+)
+
+
+class WriteUnavailable(Exception):
+    """Запись не выполнена: очередь переполнена или база занята."""
+
+
+class WriteLockTimeout(WriteUnavailable):
+    """Очередь записи не дошла до запроса за отведённое время."""
+
+
+def get_write_setting(name, default):
+    return getattr(settings, f'BLOG_WRITE_{name}', default)
+
+
+def is_write_coordinated():
+    """Функция проверяет, нужна ли очередь записи: она включена
+    настройкой, а основная база — SQLite."""
+    return (get_write_setting('COORDINATION', False)
+            and connections[DEFAULT_DB_ALIAS].vendor == 'sqlite')
+
+
+def get_write_lock_path():
+    """Функция возвращает путь к файлу блокировки записи:
+    по умолчанию он лежит рядом с файлом базы SQLite."""
+    return get_write_setting(
+        'LOCK_FILE',
+        f'{settings.DATABASES[DEFAULT_DB_ALIAS]["NAME"]}.write-lock'
+    )
+
+
+def increment(key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key, delta)
+
+
+def get_slot_paths():
+    return [
+        f'{get_write_lock_path()}.slot{index}'
+        for index in range(get_write_setting('QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+    ]
+
+
+@contextmanager
+def queue_slot():
+    """Контекстный менеджер занимает свободное место в очереди записи
+    и возвращает True или False, если очередь заполнена.
+
+    Место — это блокировка flock на одном из BLOG_WRITE_QUEUE_SIZE
+    файлов. Её видят все процессы сервера, а при аварийном завершении
+    процесса ядро снимает её само, поэтому длина очереди не копится
+    и не зависит от общего кэша."""
+    paths = get_slot_paths()
+    start = random.randrange(len(paths)) if paths else 0
+    for path in paths[start:] + paths[:start]:
+        slot = open(path, 'ab')
+        try:
+            fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            slot.close()
+            continue
+        try:
+            yield True
+        finally:
+            fcntl.flock(slot, fcntl.LOCK_UN)
+            slot.close()
+        return
+    yield False
+
+
+def get_queue_depth():
+    """Функция считает занятые места в очереди записи."""
+    depth = 0
+    for path in get_slot_paths():
+        with open(path, 'ab') as slot:
+            try:
+                fcntl.flock(slot, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                depth += 1
+            else:
+                fcntl.flock(slot, fcntl.LOCK_UN)
+    return depth
+
+
+@contextmanager
+def write_lock(timeout):
+    """Контекстный менеджер ждёт очереди на запись не дольше timeout
+    секунд и возвращает время ожидания в секундах."""
+    started = time.monotonic()
+    with open(get_write_lock_path(), 'ab') as lock:
+        while True:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() - started >= timeout:
+                    raise WriteLockTimeout
+                time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield time.monotonic() - started
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+@contextmanager
+def immediate_transaction(using=DEFAULT_DB_ALIAS):
+    """Транзакция, которая сразу берёт блокировку записи SQLite.
+    Вложенные atomic() внутри неё становятся точками сохранения."""
+    connection = connections[using]
+    connection.begin_immediate = True
+    try:
+        with transaction.atomic(using=using):
+            yield
+    finally:
+        connection.begin_immediate = False
+
+
+def is_busy_error(error):
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+def run_with_retries(func, *args, **kwargs):
+    """Функция выполняет func в транзакции BEGIN IMMEDIATE и повторяет
+    её с растущей задержкой, пока база занята."""
+    retries = get_write_setting('RETRIES', DEFAULT_RETRIES)
+    backoff = get_write_setting('BACKOFF', DEFAULT_BACKOFF)
+    for attempt in range(retries + 1):
+        try:
+            with immediate_transaction():
+                return func(*args, **kwargs)
+        except OperationalError as error:
+            if not is_busy_error(error) or attempt == retries:
+                raise
+        increment(WRITE_RETRIES_KEY)
+        time.sleep(backoff * 2 ** attempt * (1 + random.random()))
+
+
+def get_unavailable_response():
+    response = HttpResponse(
+        'Сервис перегружен, повторите попытку позже.',
+        content_type='text/plain; charset=utf-8',
+        status=503
+    )
+    response['Retry-After'] = RETRY_AFTER
+    return response
+
+
+def serialized_write(func, *args, **kwargs):
+    """Функция выполняет запись func(*args, **kwargs) через очередь
+    записи и возвращает её результат.
+
+    Если очередь длиннее BLOG_WRITE_QUEUE_SIZE, не подошла за
+    BLOG_WRITE_LOCK_TIMEOUT секунд или база осталась занятой после
+    всех повторов, вызывается WriteUnavailable."""
+    if not is_write_coordinated():
+        return func(*args, **kwargs)
+
+    try:
+        with queue_slot() as has_slot:
+            if not has_slot:
+                raise WriteUnavailable
+            timeout = get_write_setting('LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+            with write_lock(timeout) as waited:
+                increment(WRITE_COUNT_KEY)
+                increment(WRITE_WAIT_KEY, int(waited * 1_000_000))
+                return run_with_retries(func, *args, **kwargs)
+    except WriteUnavailable:
+        increment(WRITE_REJECTED_KEY)
+        raise
+    except OperationalError as error:
+        if not is_busy_error(error):
+            raise
+        increment(WRITE_REJECTED_KEY)
+        raise WriteUnavailable from error
+
+
+def unavailable_on_busy_write(view_func):
+    """Функция-декоратор отвечает 503 с Retry-After вместо ошибки
+    сервера, если запись view не прошла через очередь записи."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except WriteUnavailable:
+            return get_unavailable_response()
+    return wrapper
+
+
+def get_write_stats():
+    """Функция возвращает текущую длину очереди записи, число записей,
+    среднее ожидание очереди в миллисекундах, число повторов из-за
+    занятой базы и число отклонённых запросов."""
+    stats = cache.get_many(WRITE_STATS_KEYS)
+    writes = stats.get(WRITE_COUNT_KEY, 0)
+    wait = stats.get(WRITE_WAIT_KEY, 0)
+    return {
+        'depth': get_queue_depth(),
+        'writes': writes,
+        'average_wait_ms': wait / writes / 1000 if writes else 0.0,
+        'retries': stats.get(WRITE_RETRIES_KEY, 0),
+        'rejected': stats.get(WRITE_REJECTED_KEY, 0),
+    }
+
+
+def reset_write_stats():
+    cache.delete_many(WRITE_STATS_KEYS)
@@ -0,0 +1,81 @@
+"""Распределение запросов к базе между основной базой и репликой."""
+from asgiref.local import Local
+from django.conf import settings
+
+PRIMARY_DATABASE = 'default'
+REPLICA_DATABASE = 'replica'
+PRIMARY_PIN_COOKIE = 'use_primary'
+# Изменения этих приложений пользователь должен сразу видеть сам.
+STICKY_APP_LABELS = ('blog',)
+# Сессии пишутся при каждом входе, и реплика может их ещё не знать.
+PRIMARY_ONLY_APP_LABELS = ('sessions',)
+READ_METHODS = ('GET', 'HEAD')
+
+_state = Local()
+
+
+class PrimaryReplicaRouter:
+    """Роутер отправляет чтение из view, перечисленных в
+    REPLICA_VIEW_NAMES, в реплику, а всю запись — в основную базу.
+
+    Чтение идёт в реплику, только если включена настройка
+    BLOG_READ_REPLICA и пользователь ещё ничего не записывал
+    в эту сессию браузера (см. PrimaryPinMiddleware)."""
+
+    def db_for_read(self, model, **hints):
+        if (getattr(_state, 'replica', False)
+           and not getattr(_state, 'pinned', False)
+           and model._meta.app_label not in PRIMARY_ONLY_APP_LABELS
+           and getattr(settings, 'BLOG_READ_REPLICA', False)):
+            return REPLICA_DATABASE
+        return PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label in STICKY_APP_LABELS:
+            _state.wrote = True
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Реплика копирует основную базу, поэтому миграции
+        применяются только к ней."""
+        return db == PRIMARY_DATABASE
+
+
+class PrimaryPinMiddleware:
+    """Middleware отмечает запросы, чтение которых можно отдать
+    реплике, и закрепляет пользователя за основной базой до конца
+    сессии браузера после первой записи: так он сразу видит свои
+    посты и комментарии, даже если реплика отстаёт."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.pinned = PRIMARY_PIN_COOKIE in request.COOKIES
+        _state.replica = False
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            if _state.wrote and not _state.pinned:
+                response.set_cookie(
+                    PRIMARY_PIN_COOKIE,
+                    '1',
+                    httponly=True,
+                    samesite='Lax'
+                )
+            return response
+        finally:
+            _state.pinned = _state.replica = _state.wrote = False
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        _state.replica = (
+            request.method in READ_METHODS
+            and request.resolver_match.view_name in getattr(
+                settings,
+                'REPLICA_VIEW_NAMES',
+                ()
+            )
+        )
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -20,21 +21,43 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-(!lmw=)5&fy-35#e(0svr$k9++nu3ife^(n*l54z)myx%)#&(q'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'django-insecure-(!lmw=)5&fy-35#e(0svr$k9++nu3ife^(n*l54z)myx%)#&(q'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', 'true').lower() in ('1', 'true', 'yes')
 
-ALLOWED_HOSTS = [
-    '127.0.0.1',
-    'localhost'
-]
+# Через запятую, например DJANGO_ALLOWED_HOSTS=blogicum.ru,www.blogicum.ru.
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS',
+    '127.0.0.1,localhost'
+).split(',')
 
 CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
 
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'blog:index'
 
+# Режим пагинации лент: 'page' — по номеру страницы,
+# 'keyset' — по курсорам ?after=/?before= без COUNT(*) и OFFSET.
+BLOG_FEED_PAGINATION = 'page'
+
+# Потоковая отрисовка лент и страницы поста: <head> уходит клиенту
+# сразу, а карточки и комментарии — порциями по мере отрисовки.
+BLOG_STREAMING_RENDER = False
+
+# Очередь записи: POST-запросы блога пишут в SQLite по одному
+# в транзакции BEGIN IMMEDIATE с повторами, пока база занята.
+# Запросы сверх BLOG_WRITE_QUEUE_SIZE получают 503 с Retry-After.
+# С PostgreSQL очередь не используется.
+BLOG_WRITE_COORDINATION = False
+BLOG_WRITE_QUEUE_SIZE = 32
+BLOG_WRITE_LOCK_TIMEOUT = 10
+BLOG_WRITE_RETRIES = 3
+BLOG_WRITE_BACKOFF = 0.05
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -57,6 +80,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'blogicum.routers.PrimaryPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,8 +89,21 @@ ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+
+# Заголовок, которым передача медиафайлов поручается веб-серверу
+# после проверки доступа: 'X-Accel-Redirect' для nginx (internal
+# location MEDIA_ACCEL_PREFIX с alias на MEDIA_ROOT) или 'X-Sendfile'
+# для Apache и lighttpd. None — файлы отдаёт сам Django.
+MEDIA_ACCEL_HEADER = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
+# Кэш копий изображений, уменьшенных по запросу, и его предельный
+# размер: при переполнении удаляются давно не запрошенные копии.
+BLOG_IMAGE_CACHE_DIR = MEDIA_ROOT / 'resized'
+BLOG_IMAGE_CACHE_MAX_SIZE = 256 * 1024 * 1024
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -89,12 +126,102 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Профиль базы выбирается переменной окружения DB_ENGINE.
+# 'sqlite' (по умолчанию): бэкенд blogicum.sqlite3 включает WAL и другие
+# PRAGMA из OPTIONS['pragmas'] при каждом соединении. Соединения живут
+# CONN_MAX_AGE секунд и проверяются перед повторным использованием.
+# 'postgresql': параметры берутся из POSTGRES_DB, POSTGRES_USER,
+# POSTGRES_PASSWORD, POSTGRES_HOST и POSTGRES_PORT, реплика — из
+# POSTGRES_REPLICA_HOST (без неё чтение идёт из основного сервера).
+# База создаётся в кодировке UTF8, иначе полнотекстовый поиск
+# не разбирает кириллицу на слова.
+# Миграция 0021_postgres_indexes добавляет для PostgreSQL покрывающие
+# индексы ленты и полнотекстовый индекс GIN.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
+if DB_ENGINE == 'postgresql':
+    POSTGRES_SETTINGS = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'blogicum'),
+        'USER': os.environ.get('POSTGRES_USER', 'blogicum'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+        'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+    }
+    DATABASES = {
+        'default': POSTGRES_SETTINGS,
+        'replica': {
+            **POSTGRES_SETTINGS,
+            'HOST': os.environ.get(
+                'POSTGRES_REPLICA_HOST',
+                POSTGRES_SETTINGS['HOST']
+            ),
+            'TEST': {
+                'MIRROR': 'default',
+            },
+        },
     }
-}
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'blogicum.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pragmas': {
+                    'busy_timeout': 5000,
+                    'journal_mode': 'WAL',
+                    'synchronous': 'NORMAL',
+                    'mmap_size': 128 * 1024 * 1024,
+                    'cache_size': -20000,
+                    'temp_store': 'MEMORY',
+                },
+            },
+        },
+        'replica': {
+            'ENGINE': 'blogicum.sqlite3',
+            'NAME': BASE_DIR / 'db_replica.sqlite3',
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'TEST': {
+                'MIRROR': 'default',
+            },
+        },
+    }
+else:
+    raise ValueError(f'Неизвестный DB_ENGINE: {DB_ENGINE}')
+
+# Несколько серверов приложения должны делить один кэш, иначе
+# сброс кэша страниц и счётчики очереди видит только один процесс:
+# CACHE_LOCATION задаёт адрес memcached, например 127.0.0.1:11211.
+if os.environ.get('CACHE_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['CACHE_LOCATION'],
+        },
+    }
+
+# Чтение из реплики: view из REPLICA_VIEW_NAMES читают из базы replica,
+# пока пользователь ничего не записал. Локально реплику заменяет копия
+# основной базы: python manage.py copy_replica.
+DATABASE_ROUTERS = ['blogicum.routers.PrimaryReplicaRouter']
+BLOG_READ_REPLICA = os.environ.get(
+    'BLOG_READ_REPLICA', ''
+).lower() in ('1', 'true', 'yes')
+REPLICA_VIEW_NAMES = (
+    'blog:index',
+    'blog:category_posts',
+    'blog:profile',
+    'blog:post_detail',
+    'blog:post_comments',
+    'blog:search',
+    'pages:about',
+    'pages:rules',
+)
 
 
 # Password validation
@@ -139,6 +266,11 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# collectstatic добавляет к именам файлов хеш содержимого и готовит
+# сжатые копии .gz и .br, поэтому статику можно кэшировать бессрочно.
+STATIC_ROOT = BASE_DIR / 'static_root'
+STATICFILES_STORAGE = 'blogicum.staticfiles.CompressedManifestStaticFilesStorage'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,77 @@
+"""Бэкенд SQLite с настройкой соединения для работы под нагрузкой.
+
+Подключается через ENGINE = 'blogicum.sqlite3'. При каждом новом
+соединении выполняются PRAGMA из OPTIONS['pragmas'] поверх
+DEFAULT_PRAGMAS, а при CONN_HEALTH_CHECKS постоянное соединение
+проверяется перед повторным использованием в новом запросе."""
+import re
+
+from django.db.backends.sqlite3 import base
+
+# Порядок важен: busy_timeout задаётся первым, чтобы переключение
+# журнала в WAL дождалось блокировки, а не упало с «database is locked».
+DEFAULT_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+ALLOWED_PRAGMAS = frozenset(DEFAULT_PRAGMAS)
+PRAGMA_VALUE_PATTERN = re.compile(r'^-?\w+$')
+
+
+def apply_pragmas(connection, pragmas):
+    """Функция выполняет PRAGMA на соединении sqlite3. Имена и значения
+    подставляются в SQL, поэтому допускаются только известные PRAGMA
+    и значения из букв и цифр."""
+    for name, value in pragmas.items():
+        if name not in ALLOWED_PRAGMAS:
+            raise ValueError(f'Неизвестная PRAGMA: {name}')
+        if not PRAGMA_VALUE_PATTERN.match(str(value)):
+            raise ValueError(f'Недопустимое значение PRAGMA {name}: {value}')
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Включается на время blog.writes.immediate_transaction().
+    begin_immediate = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        apply_pragmas(connection, self.pragmas)
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        """BEGIN IMMEDIATE сразу берёт блокировку записи, и транзакция
+        ждёт её на старте по busy_timeout, а не получает SQLITE_BUSY
+        при первом изменении данных."""
+        self.cursor().execute(
+            'BEGIN IMMEDIATE' if self.begin_immediate else 'BEGIN'
+        )
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except base.Database.Error:
+            return False
+        return True
+
+    def close_if_unusable_or_obsolete(self):
+        """Кроме закрытия по CONN_MAX_AGE, при включённом
+        CONN_HEALTH_CHECKS закрывает неработающее постоянное соединение
+        в начале и конце запроса, чтобы следующий запрос открыл новое.
+        В Django 4.1 это делает сам фреймворк."""
+        if (self.connection is not None
+           and self.settings_dict.get('CONN_HEALTH_CHECKS')
+           and not self.in_atomic_block
+           and not self.is_usable()):
+            self.close()
+            return
+        super().close_if_unusable_or_obsolete()
@@ -0,0 +1,117 @@
+"""Сборка и раздача статических файлов проекта."""
+import gzip
+import mimetypes
+import posixpath
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage,
+    staticfiles_storage,
+)
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.xml'
+)
+# Сжатая копия сохраняется, только если она заметно меньше исходника.
+MIN_COMPRESSION_RATIO = 0.95
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+MUTABLE_MAX_AGE = 60
+ENCODINGS = (
+    ('br', '.br'),
+    ('gzip', '.gz'),
+)
+
+
+def compress(content):
+    """Функция возвращает сжатые копии содержимого по расширению
+    их файлов: .gz и, если установлен пакет Brotli, .br."""
+    variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(content)
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище статики с хешем содержимого в именах файлов
+    и заранее сжатыми копиями .gz и .br, которые готовит collectstatic.
+
+    Если манифест ещё не собран, ссылки ведут на файлы без хеша:
+    так проект работает без collectstatic, например в тестах."""
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, *args, **kwargs):
+        yield from super().post_process(*args, **kwargs)
+        if kwargs.get('dry_run'):
+            return
+        for name in set(self.hashed_files.values()):
+            self.compress_file(name)
+
+    def compress_file(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        content = Path(self.path(name)).read_bytes()
+        for extension, compressed in compress(content).items():
+            path = Path(self.path(name + extension))
+            if len(compressed) < len(content) * MIN_COMPRESSION_RATIO:
+                path.write_bytes(compressed)
+            else:
+                path.unlink(missing_ok=True)
+
+    def is_immutable(self, name):
+        """Файл с хешем в имени никогда не меняется."""
+        return name in self.hashed_files.values()
+
+
+def serve_static(request, path):
+    """Функция отдаёт собранную статику, когда перед проектом нет
+    отдельного веб-сервера: выбирает сжатую копию по Accept-Encoding,
+    а файлы с хешем в имени разрешает кэшировать бессрочно."""
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = Path(safe_join(staticfiles_storage.location, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+
+    accepted = {
+        value.split(';')[0].strip()
+        for value in request.headers.get('Accept-Encoding', '').split(',')
+    }
+    encoding = None
+    for name, extension in ENCODINGS:
+        compressed_path = full_path.with_name(full_path.name + extension)
+        if name in accepted and compressed_path.is_file():
+            encoding, full_path = name, compressed_path
+            break
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    is_immutable = getattr(staticfiles_storage, 'is_immutable', None)
+    if is_immutable and is_immutable(path):
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=IMMUTABLE_MAX_AGE,
+            immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=MUTABLE_MAX_AGE)
+    return response
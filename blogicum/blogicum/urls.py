@@ -1,9 +1,13 @@
 """Основной роутинг веб-сайта."""
-from django.urls import include, path, reverse_lazy
+from django.conf import settings
+from django.urls import include, path, re_path, reverse_lazy
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
 from django.views.generic.edit import CreateView
 
+from blog.views import serve_media
+from blogicum.staticfiles import serve_static
+
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
 
@@ -20,5 +24,13 @@ urlpatterns = [
     path('auth/', include('django.contrib.auth.urls')),
     path('pages/', include('pages.urls', namespace='pages')),
     path('admin/', admin.site.urls),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(settings.STATIC_URL.lstrip('/')),
+        serve_static
+    ),
+    re_path(
+        r'^{}(?P<path>.+)$'.format(settings.MEDIA_URL.lstrip('/')),
+        serve_media
+    ),
     path('', include('blog.urls', namespace='blog')),
 ]
@@ -33,6 +33,10 @@ class PostModelAdapter(StudentModelAdapter):
             "author",
             "category",
             "location",
+            "comment_count",
+            "is_released",
+            "is_visible",
+            "updated_at",
             "refresh_from_db",
         ]
 
@@ -0,0 +1,38 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+BLOG_TABLES = ("blog_post", "blog_comment")
+
+
+def count_blog_queries(client, url: str) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    return sum(
+        any(table in query["sql"] for table in BLOG_TABLES)
+        for query in queries.captured_queries
+    )
+
+
+@pytest.mark.django_db
+def test_author_check_takes_single_query(
+        mixer: Mixer, user, user_client, another_user_client,
+        post_with_published_location
+):
+    post_id = post_with_published_location.id
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    urls = (
+        f"/posts/{post_id}/delete/",
+        f"/posts/{post_id}/delete_comment/{comment.id}/",
+        f"/posts/{post_id}/edit_comment/{comment.id}/",
+    )
+    for url in urls:
+        for client in (user_client, another_user_client):
+            assert count_blog_queries(client, url) == 1, (
+                "Убедитесь, что проверка авторства и загрузка поста или "
+                f"комментария для страницы `{url}` выполняются одним "
+                "запросом."
+            )
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+        mixer: Mixer, post_with_published_location, another_user
+):
+    comments = mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+    mixer.blend(
+        "blog.Comment", post=post_with_published_location,
+        author=another_user
+    )
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 4, (
+        "Убедитесь, что при создании комментария увеличивается поле "
+        "`comment_count` публикации."
+    )
+
+    comments[0].delete()
+    another_user.delete()
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 2, (
+        "Убедитесь, что при удалении комментария, в том числе каскадном, "
+        "уменьшается поле `comment_count` публикации."
+    )
+
+    post_with_published_location.title = "Изменённый заголовок"
+    post_with_published_location.comment_count = 100
+    post_with_published_location.save()
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 2, (
+        "Убедитесь, что сохранение публикации не перезаписывает счётчик "
+        "комментариев."
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(mixer: Mixer, post_with_published_location):
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    Post.objects.update(comment_count=0)
+
+    call_command("recount_comments", batch_size=1)
+
+    post_with_published_location.refresh_from_db()
+    assert post_with_published_location.comment_count == 3, (
+        "Убедитесь, что команда `recount_comments` пересчитывает "
+        "количество комментариев у публикаций."
+    )
+
+
+@pytest.mark.django_db
+def test_cascade_delete_skips_per_comment_updates(
+        mixer: Mixer, post_with_published_location, another_user,
+        django_assert_max_num_queries
+):
+    other_post = mixer.blend("blog.Post")
+    mixer.cycle(30).blend("blog.Comment", post=post_with_published_location)
+    mixer.cycle(5).blend(
+        "blog.Comment", post=other_post, author=another_user
+    )
+    with django_assert_max_num_queries(15):
+        post_with_published_location.delete()
+
+    with django_assert_max_num_queries(20):
+        another_user.delete()
+    other_post.refresh_from_db()
+    assert other_post.comment_count == 0, (
+        "Убедитесь, что при удалении пользователя счётчики постов "
+        "уменьшаются на число его комментариев одним запросом."
+    )
+
+
+@pytest.mark.django_db
+def test_post_save_keeps_update_fields_semantics(
+        post_with_published_location
+):
+    post = post_with_published_location
+    post.pub_date = timezone.now() + timedelta(days=1)
+    post.save(update_fields=["pub_date"])
+    stored = Post.objects.values("is_released", "is_visible").get(pk=post.pk)
+    assert stored == {"is_released": False, "is_visible": False}, (
+        "Убедитесь, что признаки выхода и видимости сохраняются вместе "
+        "с полями из update_fields."
+    )
+
+    Post.objects.filter(pk=post.pk).delete()
+    post.save()
+    assert Post.objects.filter(pk=post.pk).exists(), (
+        "Убедитесь, что сохранение поста, строка которого удалена, "
+        "ведёт себя как обычное сохранение модели."
+    )
@@ -0,0 +1,65 @@
+import pytest
+
+from blog.models import Comment
+
+FRAGMENT_HEADERS = {"HTTP_HX_REQUEST": "true"}
+
+
+@pytest.mark.django_db
+def test_add_comment_returns_fragment(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/comment"
+
+    response = user_client.post(url, {"text": "Новый комментарий"})
+    assert response.status_code == 302, (
+        "Убедитесь, что без заголовка HX-Request после добавления "
+        "комментария выполняется перенаправление на страницу поста."
+    )
+
+    response = user_client.post(
+        url, {"text": "Комментарий из фрагмента"}, **FRAGMENT_HEADERS
+    )
+    assert response.status_code == 200
+    content = response.content.decode("utf-8")
+    comment = Comment.objects.latest("id")
+    assert f'name="comment_{comment.id}"' in content, (
+        "Убедитесь, что на запрос с заголовком HX-Request возвращается "
+        "разметка нового комментария."
+    )
+    assert "Комментарий из фрагмента" in content
+    assert "<html" not in content
+
+    response = user_client.post(
+        url, {"text": ""}, HTTP_ACCEPT="text/html-fragment"
+    )
+    assert response.status_code == 400, (
+        "Убедитесь, что при ошибке во фрагменте возвращается форма "
+        "с ошибками."
+    )
+    assert "data-comment-form" in response.content.decode("utf-8")
+    assert Comment.objects.filter(post=post).count() == 2
+
+
+@pytest.mark.django_db
+def test_edit_comment_returns_fragment(
+        mixer, user, user_client, post_with_published_location
+):
+    comment = mixer.blend(
+        "blog.Comment", post=post_with_published_location, author=user
+    )
+    url = f"/posts/{comment.post_id}/edit_comment/{comment.id}/"
+    response = user_client.post(
+        url, {"text": "Исправленный текст"}, **FRAGMENT_HEADERS
+    )
+    assert response.status_code == 200
+    content = response.content.decode("utf-8")
+    assert "Исправленный текст" in content and "<html" not in content, (
+        "Убедитесь, что после редактирования комментария по запросу "
+        "с заголовком HX-Request возвращается его разметка."
+    )
+
+    response = user_client.post(url, {"text": ""}, **FRAGMENT_HEADERS)
+    assert response.status_code == 400
+    assert url in response.content.decode("utf-8")
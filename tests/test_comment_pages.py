@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+from blog import views
+
+
+def get_more_url(content: str) -> str:
+    match = re.search(r'href="([^"]+)" data-comments-more', content)
+    return match and match.group(1).replace("&amp;", "&")
+
+
+@pytest.mark.django_db
+def test_comments_are_paginated(
+        mixer, client, post_with_published_location, monkeypatch
+):
+    monkeypatch.setattr(views, "COMMENTS_PAGE_LIMIT", 3)
+    post = post_with_published_location
+    comments = mixer.cycle(7).blend(
+        "blog.Comment", post=post, author=post.author
+    )
+
+    content = client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    assert content.count('name="comment_') == 3, (
+        "Убедитесь, что на странице поста выводится только первая "
+        "страница комментариев."
+    )
+    shown = []
+    url = get_more_url(content)
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        fragment = response.content.decode("utf-8")
+        assert "<html" not in fragment, (
+            "Убедитесь, что следующие страницы комментариев отдаются "
+            "фрагментом без обёртки страницы."
+        )
+        shown += re.findall(r'name="comment_(\d+)"', fragment)
+        url = get_more_url(fragment)
+    assert shown == [str(comment.id) for comment in comments[3:]], (
+        "Убедитесь, что страницы комментариев идут по курсору "
+        "(created_at, id) без пропусков и повторов."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_page_cache_invalidation(
+        mixer, client, post_with_published_location, monkeypatch
+):
+    monkeypatch.setattr(views, "COMMENTS_PAGE_LIMIT", 2)
+    post = post_with_published_location
+    comments = mixer.cycle(6).blend(
+        "blog.Comment", post=post, author=post.author
+    )
+    content = client.get(f"/posts/{post.id}/").content.decode("utf-8")
+    second_page = get_more_url(content)
+    third_page = get_more_url(client.get(second_page).content.decode())
+    client.get(third_page)
+
+    assert client.get(second_page)["X-Page-Cache"] == "HIT"
+    assert client.get(third_page)["X-Page-Cache"] == "HIT"
+
+    comments[2].text = "Исправленный комментарий"
+    comments[2].save()
+    response = client.get(second_page)
+    assert response["X-Page-Cache"] == "MISS", (
+        "Убедитесь, что страница комментариев сбрасывается при изменении "
+        "её комментария."
+    )
+    assert "Исправленный комментарий" in response.content.decode()
+    assert client.get(third_page)["X-Page-Cache"] == "HIT", (
+        "Убедитесь, что остальные страницы комментариев остаются в кэше."
+    )
+
+    comments[5].delete()
+    assert client.get(third_page)["X-Page-Cache"] == "MISS"
+
+    mixer.blend("blog.Comment", post=post, author=post.author)
+    assert client.get(second_page)["X-Page-Cache"] == "HIT"
+    assert client.get(third_page)["X-Page-Cache"] == "MISS", (
+        "Убедитесь, что новый комментарий сбрасывает последнюю страницу."
+    )
@@ -0,0 +1,142 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog import caching
+from blog.scheduler import release_due_posts
+
+
+@pytest.mark.django_db
+def test_blog_pages_support_conditional_get(
+        mixer: Mixer, user_client, user, published_category,
+        post_with_published_location
+):
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/posts/{post_with_published_location.id}/",
+        f"/profile/{user.username}/",
+    )
+    etags = {}
+    for url in urls:
+        response = user_client.get(url)
+        assert response.has_header("ETag") and response.has_header(
+            "Last-Modified"
+        ), f"Убедитесь, что страница `{url}` отдаёт ETag и Last-Modified."
+        etags[url] = response["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что неизменившаяся страница `{url}` отвечает 304."
+        )
+        feed_queries = [
+            query for query in queries.captured_queries
+            if '"blog_post"."text"' in query["sql"]
+        ]
+        assert not response.templates and not feed_queries, (
+            "Убедитесь, что проверка ETag выполняется до построения "
+            f"страницы `{url}`."
+        )
+
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    for url in urls:
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.OK, (
+            "Убедитесь, что после добавления комментария страница "
+            f"`{url}` перестаёт отвечать 304."
+        )
+
+
+@pytest.fixture
+def later_invalidation(monkeypatch):
+    """Сдвигает время сброса тегов, чтобы изменение попало в другую
+    секунду, чем первый ответ: Last-Modified точен до секунды."""
+    def shift():
+        real_time_ns = time.time_ns
+        monkeypatch.setattr(
+            caching.time, "time_ns", lambda: real_time_ns() + 5 * 10 ** 9
+        )
+    return shift
+
+
+@pytest.mark.django_db
+def test_feed_last_modified_tracks_deletes_and_releases(
+        mixer: Mixer, client, user, published_category,
+        post_with_published_location, later_invalidation
+):
+    scheduled = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    last_modified = client.get("/")["Last-Modified"]
+    later_invalidation()
+
+    post_with_published_location.delete()
+    response = client.get("/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что после удаления поста лента не отвечает 304 "
+        "на If-Modified-Since."
+    )
+
+    last_modified = response["Last-Modified"]
+    updated_at = scheduled.updated_at
+    later_invalidation()
+    release_due_posts(now=timezone.now() + timedelta(days=2))
+    scheduled.refresh_from_db()
+    assert scheduled.updated_at > updated_at, (
+        "Убедитесь, что выпуск отложенного поста обновляет updated_at."
+    )
+    response = client.get("/", HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что после выпуска отложенного поста лента не отвечает "
+        "304 на If-Modified-Since."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_etag_tracks_author_rename(
+        client, user, published_category, post_with_published_location
+):
+    urls = ("/", f"/category/{published_category.slug}/")
+    etags = {url: client.get(url)["ETag"] for url in urls}
+    user.username = "renamed_author"
+    user.save()
+    for url in urls:
+        response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что после смены имени автора лента `{url}` "
+            "не отвечает 304 со старым именем."
+        )
+        assert "renamed_author" in response.content.decode("utf-8")
+
+
+@pytest.mark.django_db
+def test_anonymous_cache_hit_skips_database(
+        client, published_category, post_with_published_location,
+        django_assert_num_queries
+):
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/posts/{post_with_published_location.id}/",
+    )
+    for url in urls:
+        etag = client.get(url)["ETag"]
+        with django_assert_num_queries(0):
+            response = client.get(url)
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response[caching.PAGE_CACHE_HEADER] == "HIT", (
+            f"Убедитесь, что страница `{url}` отдаётся из кэша."
+        )
+        assert response["ETag"] == etag
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+            "Убедитесь, что условный запрос к закэшированной странице "
+            f"`{url}` сверяется с её ETag без запросов к базе."
+        )
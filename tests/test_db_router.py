@@ -0,0 +1,55 @@
+import pytest
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from blogicum.routers import PRIMARY_PIN_COOKIE
+
+
+def count_post_queries(queries) -> int:
+    return sum(
+        '"blog_post"' in query["sql"] for query in queries.captured_queries
+    )
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+def test_reads_go_to_replica_until_user_writes(
+        settings, user_client, post_with_published_location
+):
+    settings.BLOG_READ_REPLICA = True
+    post = post_with_published_location
+
+    with CaptureQueriesContext(connections["replica"]) as replica_queries:
+        assert user_client.get("/").status_code == 200
+        assert user_client.get(f"/posts/{post.id}/").status_code == 200
+    assert count_post_queries(replica_queries), (
+        "Убедитесь, что ленты и страница поста читают из реплики."
+    )
+
+    with CaptureQueriesContext(connections["replica"]) as replica_queries:
+        response = user_client.post(
+            f"/posts/{post.id}/comment", {"text": "Свой комментарий"}
+        )
+    assert not count_post_queries(replica_queries), (
+        "Убедитесь, что запросы на запись не читают из реплики."
+    )
+    assert PRIMARY_PIN_COOKIE in response.cookies, (
+        "Убедитесь, что после записи пользователь закрепляется "
+        "за основной базой."
+    )
+
+    with CaptureQueriesContext(connections["replica"]) as replica_queries:
+        response = user_client.get(f"/posts/{post.id}/")
+    assert "Свой комментарий" in response.content.decode("utf-8")
+    assert not replica_queries.captured_queries, (
+        "Убедитесь, что после записи пользователь до конца сессии читает "
+        "из основной базы."
+    )
+
+
+@pytest.mark.django_db
+def test_replica_disabled_by_default(client, post_with_published_location):
+    # Обращение к реплике в этом тесте запрещено pytest-django.
+    assert client.get("/").status_code == 200, (
+        "Убедитесь, что без BLOG_READ_REPLICA все запросы идут "
+        "в основную базу."
+    )
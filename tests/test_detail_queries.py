@@ -0,0 +1,30 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from conftest import get_a_post_get_response_safely
+
+
+def count_detail_queries(client, post_id) -> int:
+    with CaptureQueriesContext(connection) as queries:
+        get_a_post_get_response_safely(client, post_id)
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_post_detail_query_count_does_not_grow_with_comments(
+        mixer: Mixer, user_client, post_with_published_location
+):
+    post_id = post_with_published_location.id
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    queries_with_one_comment = count_detail_queries(user_client, post_id)
+
+    mixer.cycle(30).blend("blog.Comment", post=post_with_published_location)
+    queries_with_many_comments = count_detail_queries(user_client, post_id)
+
+    assert queries_with_many_comments == queries_with_one_comment, (
+        "Убедитесь, что авторы комментариев на странице публикации "
+        "загружаются вместе с комментариями, а число запросов не зависит "
+        "от количества комментариев."
+    )
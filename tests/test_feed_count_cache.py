@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+
+def get_count_queries(client, url: str):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    count_queries = [
+        query for query in queries.captured_queries
+        if "COUNT(" in query["sql"].upper()
+    ]
+    return response, count_queries
+
+
+@pytest.mark.django_db
+def test_feed_count_is_cached_and_invalidated(
+        mixer: Mixer, user_client, user, published_category,
+        many_posts_with_published_locations
+):
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        _, count_queries = get_count_queries(user_client, url)
+        assert count_queries, (
+            f"Убедитесь, что страница `{url}` использует пагинацию."
+        )
+        response, count_queries = get_count_queries(user_client, url)
+        assert not count_queries, (
+            "Убедитесь, что количество постов в ленте берётся из кэша при "
+            f"повторном запросе страницы `{url}`."
+        )
+        assert response.context["page_obj"].paginator.count == 20
+
+    mixer.blend("blog.Post", author=user, category=published_category)
+    for url in urls:
+        response, count_queries = get_count_queries(user_client, url)
+        assert count_queries and (
+            response.context["page_obj"].paginator.count == 21
+        ), (
+            "Убедитесь, что кэш количества постов сбрасывается при создании "
+            f"публикации (страница `{url}`)."
+        )
+
+    published_category.is_published = False
+    published_category.save()
+    response, count_queries = get_count_queries(user_client, "/")
+    assert response.context["page_obj"].paginator.count == 0, (
+        "Убедитесь, что кэш количества постов сбрасывается при снятии "
+        "категории с публикации."
+    )
@@ -0,0 +1,157 @@
+from concurrent.futures import Future
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog import jobs
+from blog.management.commands.process_image_jobs import Command
+from blog.models import ImageJob, Post
+
+
+def process_image_jobs():
+    call_command("process_image_jobs", once=True, workers=0)
+
+
+def make_upload(size=(2000, 1000), name="photo.jpg") -> SimpleUploadedFile:
+    image_data = BytesIO()
+    Image.new("RGB", size).save(image_data, "JPEG")
+    return SimpleUploadedFile(name, image_data.getvalue(), "image/jpeg")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_post_image_renditions(user_client, post_with_published_location):
+    post = post_with_published_location
+    post.image = make_upload()
+    post.save()
+    post.refresh_from_db()
+    assert not post.image_renditions, (
+        "Убедитесь, что изображение обрабатывается вне запроса, а до "
+        "обработки выводится исходник."
+    )
+    assert post.image.url in user_client.get("/").content.decode("utf-8")
+
+    process_image_jobs()
+    post.refresh_from_db()
+    sizes = [(r["width"], r["height"]) for r in post.image_renditions]
+    assert sizes == [(640, 320), (1280, 640)], (
+        "Убедитесь, что при сохранении изображения публикации готовятся "
+        "его уменьшенные варианты."
+    )
+    storage = post.image.storage
+    for rendition in post.image_renditions:
+        assert rendition["name"].endswith(".webp")
+        with storage.open(rendition["name"]) as rendition_file:
+            assert Image.open(rendition_file).size == (
+                rendition["width"], rendition["height"]
+            )
+
+    content = user_client.get("/").content.decode("utf-8")
+    assert post.image_srcset in content and 'width="640"' in content, (
+        "Убедитесь, что карточка поста выводит варианты изображения через "
+        "srcset с явными шириной и высотой."
+    )
+
+    old_renditions = post.image_renditions
+    post.image = make_upload(size=(300, 200), name="small.jpg")
+    post.save()
+    process_image_jobs()
+    post.refresh_from_db()
+    assert [(r["width"], r["height"]) for r in post.image_renditions] == [
+        (300, 200)
+    ], "Убедитесь, что изображение не растягивается шире исходника."
+    assert not any(storage.exists(r["name"]) for r in old_renditions), (
+        "Убедитесь, что при замене изображения старые варианты удаляются."
+    )
+
+    Post.objects.filter(pk=post.pk).update(image_renditions=[])
+    call_command("make_image_renditions")
+    post.refresh_from_db()
+    assert len(post.image_renditions) == 1, (
+        "Убедитесь, что команда `make_image_renditions` готовит варианты "
+        "для уже загруженных изображений."
+    )
+    post.delete()
+
+
+@pytest.mark.django_db
+def test_image_job_fixes_orientation_and_strips_metadata(
+        post_with_published_location
+):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: повёрнуто на 90° по часовой стрелке
+    image_data = BytesIO()
+    Image.new("RGB", (200, 100)).save(image_data, "JPEG", exif=exif)
+    post = post_with_published_location
+    post.image = SimpleUploadedFile(
+        "rotated.jpg", image_data.getvalue(), "image/jpeg"
+    )
+    post.save()
+
+    process_image_jobs()
+
+    post.refresh_from_db()
+    with post.image.open("rb"):
+        original = Image.open(post.image)
+        assert original.size == (100, 200), (
+            "Убедитесь, что исходник поворачивается по EXIF при обработке."
+        )
+        assert not original.getexif(), (
+            "Убедитесь, что из исходника удаляются метаданные."
+        )
+    assert post.image_jobs.get().status == "done"
+    post.delete()
+
+
+@pytest.mark.django_db
+def test_image_job_failures_do_not_stop_worker(
+        monkeypatch, mixer, post_with_published_location
+):
+    deleted = mixer.blend(
+        "blog.Post", author=post_with_published_location.author
+    )
+    deleted.image = make_upload(name="deleted.jpg")
+    deleted.save()
+    post = post_with_published_location
+    post.image = make_upload()
+    post.save()
+    job_ids = jobs.claim_image_jobs(2)
+    deleted_job_id = deleted.image_jobs.get().pk
+    deleted.delete()
+    assert jobs.run_image_job(deleted_job_id) == jobs.JOB_MISSING, (
+        "Убедитесь, что задание удалённого поста пропускается без ошибки."
+    )
+
+    def broken_normalize(image):
+        raise RuntimeError("сбой")
+
+    monkeypatch.setattr(jobs, "normalize_image", broken_normalize)
+    job = post.image_jobs.get()
+    assert jobs.run_image_job(job.pk) == ImageJob.FAILED
+    job.refresh_from_db()
+    assert job.status == ImageJob.FAILED and "RuntimeError" in job.error, (
+        "Убедитесь, что неожиданная ошибка отмечает задание ошибочным, "
+        "а не оставляет его в статусе running."
+    )
+
+    class Executor:
+        def submit(self, func, job_id):
+            future = Future()
+            if job_id == job.pk:
+                future.set_exception(ValueError("ошибка в процессе пула"))
+            else:
+                future.set_result(ImageJob.DONE)
+            return future
+
+    ImageJob.objects.filter(pk=job.pk).update(status=ImageJob.RUNNING)
+    results = dict(Command().run_in_pool(Executor(), job_ids))
+    assert results == {
+        deleted_job_id: ImageJob.DONE, job.pk: ImageJob.FAILED
+    }, (
+        "Убедитесь, что ошибка одного задания в пуле не прерывает "
+        "обработку остальных."
+    )
+    assert ImageJob.objects.get(pk=job.pk).status == ImageJob.FAILED
+    post.delete()
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from blog import resize
+from blog.models import Post
+
+
+@pytest.fixture
+def image_cache(settings, tmp_path):
+    settings.BLOG_IMAGE_CACHE_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def post_with_image(post_with_published_location):
+    image_data = BytesIO()
+    Image.new("RGB", (1000, 500), "navy").save(image_data, "JPEG")
+    post = post_with_published_location
+    post.image = SimpleUploadedFile(
+        "resize.jpg", image_data.getvalue(), "image/jpeg"
+    )
+    post.save()
+    yield post
+    post.delete()
+
+
+def read_image(response):
+    return Image.open(BytesIO(b"".join(response.streaming_content)))
+
+
+@pytest.mark.django_db
+def test_resize_endpoint(client, image_cache, post_with_image, monkeypatch):
+    calls = []
+    resize_image = resize.resize_image
+    monkeypatch.setattr(
+        resize,
+        "resize_image",
+        lambda *args: calls.append(args) or resize_image(*args)
+    )
+    url = post_with_image.get_image_url(320)
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/webp"
+    assert read_image(response).size == (320, 160), (
+        "Убедитесь, что изображение уменьшается до запрошенной ширины."
+    )
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что копии изображений отдаются с долгим кэшированием."
+    )
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert len(calls) == 1, (
+        "Убедитесь, что повторный запрос копии отдаётся из дискового кэша."
+    )
+
+    jpeg = client.get(post_with_image.get_image_url(1920, "jpeg"))
+    assert read_image(jpeg).size == (1000, 500), (
+        "Убедитесь, что изображение не растягивается шире исходника."
+    )
+
+    for bad_url in (
+        post_with_image.get_image_url(321),
+        post_with_image.get_image_url(320, "gif"),
+        url.replace(post_with_image.image_key, "0" * 64),
+    ):
+        assert client.get(bad_url).status_code == 404, (
+            "Убедитесь, что отдаются только разрешённые размеры и форматы "
+            "текущего изображения поста."
+        )
+
+
+@pytest.mark.django_db
+def test_resize_hidden_post(
+        client, user_client, image_cache, post_with_image
+):
+    Post.objects.filter(pk=post_with_image.pk).update(is_visible=False)
+    url = post_with_image.get_image_url(320)
+    assert client.get(url).status_code == 404, (
+        "Убедитесь, что копии изображений скрытых постов не видны "
+        "посторонним."
+    )
+    response = user_client.get(url)
+    assert response.status_code == 200
+    assert "private" in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_resize_cache_eviction(settings, image_cache, post_with_image):
+    first = resize.get_resized_image(post_with_image.image, 320, "webp")
+    os.utime(first, (0, 0))
+    settings.BLOG_IMAGE_CACHE_MAX_SIZE = first.stat().st_size
+    second = resize.get_resized_image(post_with_image.image, 480, "webp")
+    assert second.exists() and not first.exists(), (
+        "Убедитесь, что при переполнении кэша удаляются давно не "
+        "запрошенные копии."
+    )
+    assert resize.get_lock_path(first).exists(), (
+        "Убедитесь, что при очистке кэша не удаляются файлы блокировок."
+    )
+    assert resize.update_cache_size() == second.stat().st_size
+
+
+@pytest.mark.django_db
+def test_resize_cache_size_is_tracked(
+        image_cache, post_with_image, monkeypatch
+):
+    first = resize.get_resized_image(post_with_image.image, 320, "webp")
+
+    def scan():
+        raise AssertionError(
+            "Убедитесь, что кэш не обходит каталог при каждой записи."
+        )
+
+    monkeypatch.setattr(resize, "get_cache_entries", scan)
+    second = resize.get_resized_image(post_with_image.image, 480, "webp")
+    assert resize.update_cache_size() == (
+        first.stat().st_size + second.stat().st_size
+    ), "Убедитесь, что общий размер кэша растёт с каждой записью."
+
+
+@pytest.mark.django_db
+def test_resize_requests_are_coalesced(
+        image_cache, post_with_image, monkeypatch
+):
+    calls = []
+    resize_image = resize.resize_image
+
+    def slow_resize(*args):
+        calls.append(args)
+        time.sleep(0.2)
+        return resize_image(*args)
+
+    monkeypatch.setattr(resize, "resize_image", slow_resize)
+    threads = [
+        threading.Thread(
+            target=resize.get_resized_image,
+            args=(post_with_image.image, 640, "webp")
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1, (
+        "Убедитесь, что одновременные запросы одной копии уменьшают "
+        "изображение один раз."
+    )
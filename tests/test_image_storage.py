@@ -0,0 +1,112 @@
+import hashlib
+import os
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from PIL import Image
+
+from blog.models import Post
+
+
+def make_upload(name: str) -> SimpleUploadedFile:
+    image_data = BytesIO()
+    Image.new("RGB", (123, 77), "teal").save(image_data, "PNG")
+    return SimpleUploadedFile(name, image_data.getvalue(), "image/png")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_identical_uploads_share_one_file(
+        mixer, user, post_with_published_location
+):
+    first = post_with_published_location
+    first.image = make_upload("first.PNG")
+    first.save()
+    second = mixer.blend(
+        "blog.Post", author=user, category=first.category, image=""
+    )
+    second.image = make_upload("second.png")
+    second.save()
+
+    storage = first.image.storage
+    upload = make_upload("check.png")
+    digest = hashlib.sha256(upload.read()).hexdigest()
+    assert first.image.name == second.image.name == (
+        f"blog_images/{digest[:2]}/{digest}.png"
+    ), (
+        "Убедитесь, что изображения публикаций называются по хешу "
+        "содержимого и одинаковые загрузки получают одно имя."
+    )
+    assert storage.exists(first.image.name)
+
+    first.delete()
+    assert storage.exists(second.image.name), (
+        "Убедитесь, что файл, на который ссылается другая публикация, "
+        "не удаляется вместе с постом."
+    )
+    name = second.image.name
+    second.delete()
+    assert not storage.exists(name), (
+        "Убедитесь, что файл удаляется, когда на него больше не ссылается "
+        "ни одна публикация."
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rolled_back_delete_keeps_file(post_with_published_location):
+    post = post_with_published_location
+    post.image = make_upload("rollback.png")
+    post.save()
+    name = post.image.name
+    storage = post.image.storage
+
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            Post.objects.get(pk=post.pk).delete()
+            raise RuntimeError
+    assert Post.objects.filter(pk=post.pk).exists()
+    assert storage.exists(name), (
+        "Убедитесь, что файл изображения удаляется только после фиксации "
+        "транзакции, а при откате остаётся вместе с постом."
+    )
+    post.delete()
+    assert not storage.exists(name)
+
+
+@pytest.mark.django_db
+def test_collect_image_garbage(post_with_published_location):
+    post = post_with_published_location
+    post.image = make_upload("kept.png")
+    post.save()
+    storage = post.image.storage
+    orphan = storage.save(
+        "blog_images/orphan.gif", ContentFile(b"GIF89a orphan")
+    )
+    fresh = storage.save(
+        "blog_images/fresh.gif", ContentFile(b"GIF89a fresh")
+    )
+    os.utime(storage.path(orphan), (0, 0))
+    os.utime(storage.path(post.image.name), (0, 0))
+
+    call_command("collect_image_garbage", dry_run=True)
+    assert storage.exists(orphan)
+
+    call_command("collect_image_garbage")
+    assert not storage.exists(orphan), (
+        "Убедитесь, что команда `collect_image_garbage` удаляет файлы, "
+        "на которые не ссылается ни одна публикация."
+    )
+    assert storage.exists(post.image.name), (
+        "Убедитесь, что команда `collect_image_garbage` не удаляет "
+        "изображения публикаций."
+    )
+    assert storage.exists(fresh), (
+        "Убедитесь, что команда `collect_image_garbage` не трогает только "
+        "что загруженные файлы."
+    )
+    storage.delete(fresh)
+    assert Post.objects.filter(image=post.image.name).exists()
+    post.delete()
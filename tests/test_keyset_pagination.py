@@ -0,0 +1,89 @@
+import base64
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+CURSOR_PATTERN = r"\?{}=([\w-]+)"
+
+
+def _get_cursor(content: str, direction: str) -> str:
+    match = re.search(CURSOR_PATTERN.format(direction), content)
+    return match.group(1) if match else ""
+
+
+@pytest.mark.django_db
+def test_keyset_pagination_walks_feed(
+        client, many_posts_with_published_locations
+):
+    expected_ids = [
+        post.id for post in sorted(
+            many_posts_with_published_locations,
+            key=lambda post: (post.pub_date, post.id),
+            reverse=True,
+        )
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/", {"after": "", "before": "broken"})
+    assert not any(
+        "COUNT(" in query["sql"].upper() for query in queries.captured_queries
+    ), "Убедитесь, что пагинация по курсору не выполняет COUNT-запрос."
+
+    seen_ids = []
+    pages = []
+    while True:
+        page_obj = response.context["page_obj"]
+        assert len(page_obj) <= N_PER_PAGE
+        pages.append([post.id for post in page_obj])
+        seen_ids.extend(pages[-1])
+        cursor = _get_cursor(response.content.decode("utf-8"), "after")
+        if not cursor:
+            break
+        response = client.get("/", {"after": cursor})
+
+    assert seen_ids == expected_ids, (
+        "Убедитесь, что при переходе по курсорам ?after= лента проходится "
+        "целиком, без пропусков и повторов."
+    )
+
+    before_cursor = _get_cursor(response.content.decode("utf-8"), "before")
+    response = client.get("/", {"before": before_cursor})
+    assert [post.id for post in response.context["page_obj"]] == pages[-2], (
+        "Убедитесь, что курсор ?before= возвращает предыдущую страницу ленты."
+    )
+
+
+def _make_cursor(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+@pytest.mark.django_db
+def test_keyset_stale_and_overflowing_cursors(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    stale = _make_cursor("1900-01-01T00:00:00+00:00|1")
+    for url in ("/", f"/category/{post.category.slug}/",
+                f"/profile/{post.author.username}/"):
+        response = client.get(url, {"after": stale})
+        assert response.status_code == 200, (
+            "Убедитесь, что курсор за последним постом отдаёт пустую "
+            "страницу, а не ошибку сервера."
+        )
+        assert len(response.context["page_obj"]) == 0
+
+    overflow = _make_cursor("2020-01-01T00:00:00+00:00|" + "9" * 23)
+    for url, params in (
+        ("/", {"after": overflow}),
+        (f"/posts/{post.id}/comments/", {"after": overflow}),
+        ("/search/", {"q": "пост", "after": _make_cursor("1.0|" + "9" * 23)}),
+    ):
+        response = client.get(url, params)
+        assert response.status_code == 200, (
+            "Убедитесь, что id за пределами 64 бит считается "
+            "повреждённым курсором."
+        )
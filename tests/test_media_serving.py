@@ -0,0 +1,93 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from blog.models import Post
+
+
+@pytest.fixture
+def post_with_image(post_with_published_location):
+    image_data = BytesIO()
+    Image.new("RGB", (40, 30), "olive").save(image_data, "PNG")
+    post = post_with_published_location
+    post.image = SimpleUploadedFile(
+        "media.png", image_data.getvalue(), "image/png"
+    )
+    post.save()
+    yield post
+    post.delete()
+
+
+@pytest.mark.django_db
+def test_media_file_response(client, user_client, post_with_image):
+    url = post_with_image.image.url
+    assert url.startswith("/media/blog_images/")
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/png"
+    assert b"".join(response.streaming_content).startswith(b"\x89PNG"), (
+        "Убедитесь, что без настройки веб-сервера изображение отдаёт "
+        "сам Django."
+    )
+    assert "public" in response["Cache-Control"]
+
+    Post.objects.filter(pk=post_with_image.pk).update(is_visible=False)
+    assert client.get(url).status_code == 404, (
+        "Убедитесь, что изображения скрытых постов не видны посторонним."
+    )
+    response = user_client.get(url)
+    assert response.status_code == 200, (
+        "Убедитесь, что автор видит изображение своего скрытого поста."
+    )
+    assert "private" in response["Cache-Control"]
+
+    assert client.get("/media/blog_images/unknown.png").status_code == 404
+
+
+@pytest.mark.django_db
+def test_media_offloaded_to_web_server(settings, client, post_with_image):
+    url = post_with_image.image.url
+    settings.MEDIA_ACCEL_HEADER = "X-Accel-Redirect"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == (
+        f"/protected-media/{post_with_image.image.name}"
+    ), (
+        "Убедитесь, что передача файла поручается nginx через "
+        "заголовок X-Accel-Redirect."
+    )
+    assert not response.content
+    assert response["Content-Type"] == "image/png"
+
+    settings.MEDIA_ACCEL_HEADER = "X-Sendfile"
+    response = client.get(url)
+    assert response["X-Sendfile"] == post_with_image.image.path
+
+
+@pytest.mark.django_db
+def test_rendition_access_uses_name_index(client, user_client, post_with_image):
+    call_command("process_image_jobs", once=True, workers=0)
+    post_with_image.refresh_from_db()
+    rendition = post_with_image.image_renditions[0]["name"]
+    assert list(
+        post_with_image.rendition_files.values_list("name", flat=True)
+    ) == [rendition], (
+        "Убедитесь, что имена вариантов изображения записываются "
+        "в отдельную таблицу с индексом по имени."
+    )
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/media/{rendition}")
+    assert response.status_code == 200
+    assert not any(
+        "LIKE" in query["sql"].upper() for query in queries.captured_queries
+    ), "Убедитесь, что доступ к варианту проверяется без LIKE по постам."
+
+    Post.objects.filter(pk=post_with_image.pk).update(is_visible=False)
+    assert client.get(f"/media/{rendition}").status_code == 404
+    assert user_client.get(f"/media/{rendition}").status_code == 200
@@ -0,0 +1,74 @@
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+from blog.caching import PAGE_CACHE_HEADER, get_page_cache_stats
+
+
+def get_cache_status(client, url: str) -> str:
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.get(PAGE_CACHE_HEADER, "")
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(
+        client, user, published_category, post_with_published_location
+):
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/posts/{post_with_published_location.id}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        assert get_cache_status(client, url) == "MISS"
+        assert get_cache_status(client, url) == "HIT", (
+            f"Убедитесь, что страница `{url}` кэшируется для анонимных "
+            "читателей."
+        )
+    stats = get_page_cache_stats()
+    assert stats["hits"] == len(urls) and stats["misses"] == len(urls)
+    call_command("page_cache_stats", reset=True)
+    assert get_page_cache_stats()["hits"] == 0
+
+
+@pytest.mark.django_db
+def test_authenticated_pages_are_not_cached(
+        user_client, post_with_published_location
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    for _ in range(2):
+        assert get_cache_status(user_client, url) == "", (
+            "Убедитесь, что страницы авторизованных пользователей не "
+            "кэшируются."
+        )
+
+
+@pytest.mark.django_db
+def test_page_cache_is_invalidated_selectively(
+        mixer: Mixer, client, published_category, post_with_published_location,
+        post_with_another_category
+):
+    post_url = f"/posts/{post_with_published_location.id}/"
+    other_url = f"/posts/{post_with_another_category.id}/"
+    for url in ("/", post_url, other_url):
+        get_cache_status(client, url)
+
+    mixer.blend("blog.Comment", post=post_with_published_location)
+    assert get_cache_status(client, post_url) == "MISS", (
+        "Убедитесь, что новый комментарий сбрасывает кэш страницы поста."
+    )
+    assert get_cache_status(client, "/") == "MISS", (
+        "Убедитесь, что новый комментарий сбрасывает кэш лент, где "
+        "показано количество комментариев к посту."
+    )
+    assert get_cache_status(client, other_url) == "HIT", (
+        "Убедитесь, что комментарий не сбрасывает кэш страниц других постов."
+    )
+
+    location = post_with_published_location.location
+    location.name = "Новое место"
+    location.save()
+    assert get_cache_status(client, post_url) == "MISS"
+    assert "Новое место" in client.get(post_url).content.decode("utf-8")
@@ -0,0 +1,38 @@
+import pytest
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_post_card_fragment_is_cached_by_version(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    assert post.title in user_client.get("/").content.decode("utf-8")
+
+    Post.objects.filter(pk=post.pk).update(title="Обновлено без сигналов")
+    content = user_client.get("/").content.decode("utf-8")
+    assert post.title in content, (
+        "Убедитесь, что отрисованная карточка поста берётся из кэша "
+        "фрагментов."
+    )
+
+    post.refresh_from_db()
+    post.save()
+    content = user_client.get("/").content.decode("utf-8")
+    assert "Обновлено без сигналов" in content, (
+        "Убедитесь, что сохранение поста меняет версию его карточки."
+    )
+
+    location = post.location
+    location.name = "Новое место"
+    location.save()
+    assert "Новое место" in user_client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что изменение местоположения меняет версию карточек "
+        "его постов."
+    )
+
+    author = post.author
+    author.username = "renamed_author"
+    author.save()
+    assert "@renamed_author" in user_client.get("/").content.decode("utf-8")
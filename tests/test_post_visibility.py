@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+
+
+def visible_count(category) -> int:
+    return Post.objects.filter(category=category, is_visible=True).count()
+
+
+@pytest.mark.django_db
+def test_category_publication_updates_visibility_in_bulk(
+        published_category, many_posts_with_published_locations,
+        unpublished_posts_with_published_locations
+):
+    assert visible_count(published_category) == len(
+        many_posts_with_published_locations
+    )
+
+    for is_published in (False, True):
+        published_category.is_published = is_published
+        with CaptureQueriesContext(connection) as queries:
+            published_category.save()
+        post_updates = [
+            query for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "blog_post"')
+        ]
+        assert len(post_updates) == 1, (
+            "Убедитесь, что видимость постов категории пересчитывается "
+            "одним UPDATE-запросом."
+        )
+
+    assert visible_count(published_category) == len(
+        many_posts_with_published_locations
+    ), (
+        "Убедитесь, что после повторной публикации категории снова видны "
+        "только опубликованные посты."
+    )
+
+    published_category.is_published = False
+    published_category.save()
+    assert visible_count(published_category) == 0, (
+        "Убедитесь, что при снятии категории с публикации её посты "
+        "скрываются."
+    )
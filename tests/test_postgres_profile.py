@@ -0,0 +1,101 @@
+import runpy
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from blog.search import POSTGRES_SEARCH_SQL
+from blogicum import settings as project_settings
+
+
+def load_settings(monkeypatch, **environ):
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    return runpy.run_path(project_settings.__file__)
+
+
+def test_postgres_profile_from_environment(monkeypatch):
+    loaded = load_settings(
+        monkeypatch,
+        DB_ENGINE="postgresql",
+        POSTGRES_DB="blog",
+        POSTGRES_HOST="db-primary",
+        POSTGRES_REPLICA_HOST="db-replica",
+        DJANGO_ALLOWED_HOSTS="blogicum.ru,www.blogicum.ru",
+        DJANGO_DEBUG="false",
+    )
+    databases = loaded["DATABASES"]
+    assert databases["default"]["ENGINE"] == (
+        "django.db.backends.postgresql"
+    ), "Убедитесь, что DB_ENGINE=postgresql подключает PostgreSQL."
+    assert databases["default"]["NAME"] == "blog"
+    assert databases["default"]["HOST"] == "db-primary"
+    assert databases["replica"]["HOST"] == "db-replica", (
+        "Убедитесь, что адрес реплики PostgreSQL берётся из "
+        "POSTGRES_REPLICA_HOST."
+    )
+    assert "OPTIONS" not in databases["default"], (
+        "Убедитесь, что PRAGMA SQLite не передаются в PostgreSQL."
+    )
+    assert loaded["ALLOWED_HOSTS"] == ["blogicum.ru", "www.blogicum.ru"]
+    assert loaded["DEBUG"] is False
+
+
+def test_sqlite_profile_by_default(monkeypatch):
+    monkeypatch.delenv("DB_ENGINE", raising=False)
+    loaded = runpy.run_path(project_settings.__file__)
+    assert loaded["DATABASES"]["default"]["ENGINE"] == "blogicum.sqlite3"
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Индексы создаются только в PostgreSQL",
+)
+@pytest.mark.django_db
+def test_postgres_indexes_created():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes "
+            "WHERE tablename IN ('blog_post', 'blog_comment')"
+        )
+        names = {row[0] for row in cursor.fetchall()}
+    assert {
+        "post_visible_feed_cover_idx",
+        "post_visible_category_cover_idx",
+        "comment_post_page_cover_idx",
+        "post_visible_search_gin_idx",
+    } <= names, (
+        "Убедитесь, что миграции создают покрывающие и полнотекстовый "
+        "индексы PostgreSQL."
+    )
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="Индекс GIN есть только в PostgreSQL",
+)
+@pytest.mark.django_db(transaction=True)
+def test_postgres_search_uses_gin_index(
+        client, post_with_published_location
+):
+    post = post_with_published_location
+    post.title = "Горный поход"
+    post.save()
+    response = client.get("/search/", {"q": "горные походы"})
+    assert [found.id for found in response.context["page_obj"]] == [
+        post.id
+    ], "Убедитесь, что поиск в PostgreSQL учитывает морфологию."
+
+    with connection.cursor() as cursor:
+        cursor.execute("SET enable_seqscan = off")
+        cursor.execute(
+            f"EXPLAIN {POSTGRES_SEARCH_SQL}",
+            ["поход", float("-inf"), float("-inf"), 0, 10]
+        )
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        cursor.execute("RESET enable_seqscan")
+    assert "post_visible_search_gin_idx" in plan, (
+        "Убедитесь, что запрос поиска повторяет выражение GIN-индекса."
+    )
+
+    call_command("rebuild_search_index")
@@ -0,0 +1,61 @@
+from typing import List
+
+import pytest
+from django.db import connection
+from django.db.models import Q, QuerySet
+
+from blog import views
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite",
+        reason="EXPLAIN QUERY PLAN поддерживается только SQLite",
+    ),
+]
+
+
+def get_query_plan(queryset: QuerySet) -> List[str]:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def assert_uses_indexes(queryset: QuerySet, name: str):
+    plan = get_query_plan(queryset)
+    for step in plan:
+        assert "TEMP B-TREE" not in step, (
+            f"Убедитесь, что запрос `{name}` сортируется по индексу, а не "
+            f"во временном B-дереве. План запроса: {plan}"
+        )
+        is_table_scan = (
+            step.startswith("SCAN")
+            and "USING INDEX" not in step
+            and "USING COVERING INDEX" not in step
+        )
+        assert not is_table_scan, (
+            f"Убедитесь, что запрос `{name}` не читает таблицу целиком. "
+            f"План запроса: {plan}"
+        )
+
+
+def test_feed_queries_use_indexes(
+        user, published_category, many_posts_with_published_locations
+):
+    post = many_posts_with_published_locations[0]
+    limit = views.POSTS_PAGE_LIMIT
+    feed = views.get_visible_posts()
+    querysets = {
+        "index": feed,
+        "category_posts": feed.filter(category_id=published_category.id),
+        "profile": views.get_profile_posts(user, None),
+        "profile (автор)": views.get_profile_posts(user, user),
+        "keyset": feed.order_by("-pub_date", "-pk").filter(
+            Q(pub_date__lt=post.pub_date)
+            | Q(pub_date=post.pub_date, pk__lt=post.pk)
+        ),
+        "post_detail (комментарии)": post.comments.all(),
+    }
+    for name, queryset in querysets.items():
+        assert_uses_indexes(queryset[:limit], name)
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_publish_scheduled_releases_due_posts(
+        mixer: Mixer, client, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    assert not post.is_released
+    assert client.get("/").context["page_obj"].paginator.count == 0
+
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+    assert client.get(f"/posts/{post.id}/").status_code == 404, (
+        "Убедитесь, что отложенный пост не виден, пока его не выпустит "
+        "команда `publish_scheduled`."
+    )
+
+    call_command("publish_scheduled")
+
+    post.refresh_from_db()
+    assert post.is_released, (
+        "Убедитесь, что команда `publish_scheduled` выпускает посты с "
+        "наступившей датой публикации."
+    )
+    response = client.get("/")
+    assert response.context["page_obj"].paginator.count == 1, (
+        "Убедитесь, что после выпуска отложенного поста сбрасывается кэш "
+        "количества постов в ленте."
+    )
+    assert client.get(f"/posts/{post.id}/").status_code == 200
@@ -0,0 +1,127 @@
+import re
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from conftest import N_PER_PAGE
+
+CURSOR_PATTERN = r"after=([\w-]+)"
+
+sqlite_only = pytest.mark.skipif(
+    connection.vendor != "sqlite",
+    reason="Индекс FTS5 и ранжирование bm25 есть только в SQLite",
+)
+
+
+def search_ids(client, query, **params):
+    response = client.get("/search/", {"q": query, **params})
+    assert response.status_code == 200
+    return [post.id for post in response.context["page_obj"]], response
+
+
+@pytest.fixture
+def search_post(mixer, user, published_category):
+    def create(**fields):
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category, **fields
+        )
+    return create
+
+
+@pytest.mark.django_db
+def test_search_finds_only_visible_posts(client, search_post):
+    visible = search_post(title="Котики", text="Про пушистых котиков")
+    search_post(title="Котики", text="Черновик", is_published=False)
+    search_post(title="Собаки", text="Про собак")
+
+    found, response = search_ids(client, "котики")
+    assert found == [visible.id], (
+        "Убедитесь, что поиск находит только видимые читателям посты "
+        "с искомым словом."
+    )
+    assert visible.title in response.content.decode("utf-8")
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_search_ranks_title_matches_first(client, search_post):
+    in_text = search_post(title="Заметка", text="Новая гитара")
+    in_title = search_post(title="Гитара", text="Новая заметка")
+
+    found, _ = search_ids(client, "гитара")
+    assert found == [in_title.id, in_text.id], (
+        "Убедитесь, что совпадение в заголовке повышает ранг поста."
+    )
+
+
+@pytest.mark.django_db
+def test_search_index_follows_edits_and_deletes(client, search_post):
+    post = search_post(title="Старое название", text="Текст")
+    post.title = "Новое название"
+    post.save()
+    assert search_ids(client, "старое")[0] == [], (
+        "Убедитесь, что после изменения поста старый заголовок "
+        "не находится."
+    )
+    assert search_ids(client, "новое")[0] == [post.id]
+
+    post.delete()
+    assert search_ids(client, "новое")[0] == [], (
+        "Убедитесь, что удалённый пост пропадает из поиска."
+    )
+
+
+@pytest.mark.django_db
+def test_search_pages_by_cursor(client, search_post):
+    posts = [
+        search_post(title=f"Поход {number}", text="Горы и реки")
+        for number in range(N_PER_PAGE + 3)
+    ]
+
+    first, response = search_ids(client, "горы")
+    assert len(first) == N_PER_PAGE
+    cursor = re.search(CURSOR_PATTERN, response.content.decode("utf-8"))
+    assert cursor, "Убедитесь, что у результатов поиска есть ссылка дальше."
+    second, response = search_ids(client, "горы", after=cursor.group(1))
+    assert sorted(first + second) == sorted(post.id for post in posts), (
+        "Убедитесь, что страницы поиска по курсору не пропускают "
+        "и не повторяют посты."
+    )
+    assert not response.context["page_obj"].has_next()
+
+
+@pytest.mark.django_db
+def test_search_ignores_query_syntax(client, search_post):
+    post = search_post(title="Кофе", text="Без сахара")
+    for query in ('кофе AND', '"кофе', "кофе*", "NEAR(кофе", "-"):
+        response = client.get("/search/", {"q": query})
+        assert response.status_code == 200, (
+            "Убедитесь, что служебные символы в запросе не ломают поиск."
+        )
+    assert search_ids(client, '"кофе')[0] == [post.id]
+    assert search_ids(client, "")[0] == []
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_rebuild_search_index(client, search_post):
+    posts = [search_post(title="Рецепт", text="Блины") for _ in range(5)]
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM blog_post_search")
+        cursor.execute(
+            "INSERT INTO blog_post_search (rowid, title, text) "
+            "VALUES (100000, 'Рецепт', 'Удалённый пост')"
+        )
+    assert search_ids(client, "блины")[0] == []
+
+    call_command("rebuild_search_index", batch_size=2)
+    assert sorted(search_ids(client, "рецепт")[0]) == sorted(
+        post.id for post in posts
+    ), "Убедитесь, что команда заново индексирует все посты пачками."
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM blog_post_search")
+        assert cursor.fetchone()[0] == len(posts), (
+            "Убедитесь, что команда удаляет из индекса записи "
+            "удалённых постов."
+        )
@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+from django.db import connection
+
+from blogicum.sqlite3.base import DatabaseWrapper, apply_pragmas
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "sqlite",
+    reason="Настройка соединения относится только к бэкенду SQLite",
+)
+
+
+@pytest.fixture
+def file_connection(tmp_path, django_db_blocker):
+    wrapper = DatabaseWrapper(
+        {**connection.settings_dict, "NAME": str(tmp_path / "db.sqlite3")}
+    )
+    with django_db_blocker.unblock():
+        yield wrapper
+        wrapper.close()
+
+
+def get_pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_applied_on_connect(file_connection):
+    assert get_pragma(file_connection, "journal_mode") == "wal", (
+        "Убедитесь, что соединение с SQLite переводит базу в режим WAL."
+    )
+    assert get_pragma(file_connection, "busy_timeout") == 5000
+    assert get_pragma(file_connection, "synchronous") == 1
+    assert get_pragma(file_connection, "temp_store") == 2
+    assert get_pragma(file_connection, "foreign_keys") == 1
+
+
+def test_unusable_connection_is_replaced(file_connection):
+    file_connection.settings_dict["CONN_HEALTH_CHECKS"] = True
+    file_connection.ensure_connection()
+    file_connection.connection.close()
+    file_connection.close_if_unusable_or_obsolete()
+    assert file_connection.connection is None, (
+        "Убедитесь, что неработающее постоянное соединение закрывается "
+        "перед следующим запросом."
+    )
+    assert get_pragma(file_connection, "journal_mode") == "wal"
+
+
+def test_unknown_pragma_rejected():
+    raw = sqlite3.connect(":memory:")
+    with pytest.raises(ValueError):
+        apply_pragmas(raw, {"writable_schema": 1})
+    with pytest.raises(ValueError):
+        apply_pragmas(raw, {"cache_size": "1; DROP TABLE x"})
+    raw.close()
@@ -0,0 +1,46 @@
+import gzip
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+
+
+@pytest.fixture
+def collected_static(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.DEBUG = False
+    call_command("collectstatic", interactive=False, verbosity=0)
+    return tmp_path
+
+
+@pytest.mark.django_db
+def test_static_assets_are_fingerprinted(client, collected_static):
+    css_url = staticfiles_storage.url("css/bootstrap.min.css")
+    assert css_url != "/static/css/bootstrap.min.css", (
+        "Убедитесь, что collectstatic добавляет хеш содержимого к именам "
+        "статических файлов."
+    )
+    content = client.get("/").content.decode("utf-8")
+    assert css_url in content and "cdn.jsdelivr.net" not in content, (
+        "Убедитесь, что стили Bootstrap подключаются из статики проекта, "
+        "а не с CDN."
+    )
+
+    response = client.get(css_url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response.status_code == 200
+    assert response["Content-Encoding"] == "gzip", (
+        "Убедитесь, что статика отдаётся заранее сжатой копией."
+    )
+    body = gzip.decompress(b"".join(response.streaming_content))
+    assert body.startswith(b'@charset "UTF-8"')
+    assert "immutable" in response["Cache-Control"], (
+        "Убедитесь, что файлы с хешем в имени кэшируются бессрочно."
+    )
+    assert "Accept-Encoding" in response["Vary"]
+
+    plain = client.get(css_url)
+    assert not plain.has_header("Content-Encoding")
+
+    mutable = client.get("/static/css/bootstrap.min.css")
+    assert "immutable" not in mutable["Cache-Control"]
+    assert client.get("/static/../manage.py").status_code == 404
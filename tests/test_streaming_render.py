@@ -0,0 +1,43 @@
+import pytest
+
+from blog import views
+
+
+@pytest.mark.django_db
+def test_post_detail_streams_comments(
+        settings, mixer, user_client, post_with_published_location,
+        monkeypatch
+):
+    settings.BLOG_STREAMING_RENDER = True
+    monkeypatch.setattr(views, "COMMENTS_PAGE_LIMIT", 250)
+    post = post_with_published_location
+    mixer.cycle(250).blend("blog.Comment", post=post, author=post.author)
+
+    response = user_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 200
+    assert response.streaming, (
+        "Убедитесь, что в потоковом режиме страница поста отдаётся через "
+        "StreamingHttpResponse."
+    )
+    chunks = [chunk.decode("utf-8") for chunk in response.streaming_content]
+    assert "stylesheet" in chunks[0] and "comment_" not in chunks[0], (
+        "Убедитесь, что начало страницы со стилями отдаётся до комментариев."
+    )
+    assert len(chunks) >= 5, (
+        "Убедитесь, что комментарии отдаются порциями."
+    )
+    content = "".join(chunks)
+    assert content.count('name="comment_') == 250
+    assert "stream:" not in content
+    assert content.rstrip().endswith("</html>")
+
+
+@pytest.mark.django_db
+def test_feed_streams_cards(settings, client, post_with_published_location):
+    settings.BLOG_STREAMING_RENDER = True
+    response = client.get("/")
+    assert response.streaming
+    content = b"".join(response.streaming_content).decode("utf-8")
+    assert post_with_published_location.title in content, (
+        "Убедитесь, что в потоковом режиме лента выводит карточки постов."
+    )
@@ -0,0 +1,145 @@
+import fcntl
+
+import pytest
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comment
+from blog.writes import (
+    get_slot_paths,
+    get_write_stats,
+    run_with_retries,
+    serialized_write
+)
+
+sqlite_only = pytest.mark.skipif(
+    connection.vendor != "sqlite",
+    reason="Очередь записи работает только с SQLite",
+)
+
+
+@pytest.fixture
+def write_queue(settings, tmp_path):
+    settings.BLOG_WRITE_COORDINATION = True
+    settings.BLOG_WRITE_LOCK_FILE = str(tmp_path / "write.lock")
+    settings.BLOG_WRITE_BACKOFF = 0
+
+
+@sqlite_only
+@pytest.mark.django_db(transaction=True)
+def test_writes_use_immediate_transaction(
+        write_queue, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.post(
+            f"/posts/{post.id}/comment", {"text": "Через очередь"}
+        )
+    assert response.status_code == 302
+    assert Comment.objects.filter(post=post).exists()
+    assert any(
+        query["sql"] == "BEGIN IMMEDIATE" for query in queries.captured_queries
+    ), (
+        "Убедитесь, что запись через очередь выполняется в транзакции "
+        "BEGIN IMMEDIATE."
+    )
+    stats = get_write_stats()
+    assert stats["writes"] == 1 and stats["depth"] == 0, (
+        "Убедитесь, что очередь записи считает записи и свою длину."
+    )
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_full_queue_rejects_gracefully(
+        settings, write_queue, user_client, post_with_published_location
+):
+    settings.BLOG_WRITE_QUEUE_SIZE = 0
+    response = user_client.post(
+        f"/posts/{post_with_published_location.id}/comment",
+        {"text": "Не поместится"}
+    )
+    assert response.status_code == 503, (
+        "Убедитесь, что при переполненной очереди записи возвращается 503."
+    )
+    assert response["Retry-After"]
+    assert get_write_stats()["rejected"] == 1
+
+
+@sqlite_only
+@pytest.mark.django_db
+def test_queue_slots_shared_and_freed_on_exit(
+        settings, write_queue, user_client, post_with_published_location
+):
+    settings.BLOG_WRITE_QUEUE_SIZE = 2
+    url = f"/posts/{post_with_published_location.id}/comment"
+    # Места занимают запросы других процессов сервера.
+    held = []
+    for path in get_slot_paths():
+        slot = open(path, "ab")
+        fcntl.flock(slot, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        held.append(slot)
+    assert get_write_stats()["depth"] == 2
+    assert user_client.post(url, {"text": "Очередь"}).status_code == 503, (
+        "Убедитесь, что места в очереди записи общие для всех процессов."
+    )
+
+    # Закрытие файла — то же, что аварийное завершение процесса.
+    held.pop().close()
+    assert user_client.post(url, {"text": "Очередь"}).status_code == 302, (
+        "Убедитесь, что место процесса, завершившегося посреди запроса, "
+        "освобождается."
+    )
+    assert get_write_stats()["depth"] == 1
+    for slot in held:
+        slot.close()
+
+
+@pytest.mark.django_db
+def test_busy_database_is_retried(write_queue):
+    attempts = []
+
+    def flaky_write():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OperationalError("database is locked")
+        return "ok"
+
+    assert run_with_retries(flaky_write) == "ok"
+    assert get_write_stats()["retries"] == 2, (
+        "Убедитесь, что запись повторяется, пока база занята."
+    )
+
+    def broken_write():
+        raise OperationalError("no such table: blog_post")
+
+    with pytest.raises(OperationalError):
+        run_with_retries(broken_write)
+
+
+@sqlite_only
+@pytest.mark.django_db(transaction=True)
+def test_queue_covers_only_the_write(
+        write_queue, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    with CaptureQueriesContext(connection) as queries:
+        response = user_client.post(
+            f"/posts/{post.id}/comment",
+            {"text": "Через очередь"}
+        )
+    assert response.status_code == 302
+    sql = [query["sql"] for query in queries.captured_queries]
+    begin = sql.index("BEGIN IMMEDIATE")
+    assert any('FROM "blog_post"' in query for query in sql[:begin]), (
+        "Убедитесь, что в очереди записи выполняется только запись, "
+        "а не весь view."
+    )
+
+
+def test_queue_is_off_for_other_databases(write_queue, monkeypatch):
+    monkeypatch.setattr(connection, "vendor", "postgresql")
+    assert serialized_write(lambda: "ok") == "ok"
+    assert get_write_stats()["writes"] == 0, (
+        "Убедитесь, что очередь записи не используется вне SQLite."
+    )